@@ -4,33 +4,45 @@ Phase 1: MOCK_ADVISOR_REPORT used for the skeleton demo.
 Phase 4: call get_advisor().run(..., deps=deps) for real LLM + RAG + web search.
 
 System prompt is loaded from ai/prompts/agent2_advisor.md for easy versioning.
+With settings.gap_scoring = "local" (default) the gap scores come from
+ai/gap_scoring.py and the agent only writes the narrative (AdvisorDraft, with
+agent2_gap_narrative.md as STEP 1); "llm" keeps the full LLM-scored
+AdvisorReport (agent2_gap_scoring.md).
 Agent and tools are defined lazily so Phase 1 runs without API keys.
 """
 
 from __future__ import annotations
 
-import httpx
 from pydantic_ai import Agent, RunContext
 
 from ai.agents.deps import OrchestratorDeps
 from ai.prompts import load_prompt
 from config import settings
-from schemas.agent2 import AdvisorReport
+from schemas.agent2 import AdvisorDraft, AdvisorReport
 
 # Loaded from disk — edit ai/prompts/agent2_advisor.md to tune the prompt.
 _SYSTEM_PROMPT = load_prompt("agent2_advisor")
 _advisor = None
 
 
+def advisor_output_type() -> type[AdvisorDraft] | type[AdvisorReport]:
+    """AdvisorDraft when gap scores are computed locally, else the full AdvisorReport."""
+    return AdvisorDraft if settings.gap_scoring == "local" else AdvisorReport
+
+
 def get_advisor():
     """Return the PydanticAI Advisor agent, creating it on first call."""
     global _advisor
     if _advisor is None:
+        output_type = advisor_output_type()
+        gap_prompt = "agent2_gap_narrative" if output_type is AdvisorDraft else "agent2_gap_scoring"
         _advisor = Agent(
             model=settings.ai_model,
-            output_type=AdvisorReport,
+            output_type=output_type,
             deps_type=OrchestratorDeps,
-            system_prompt=_SYSTEM_PROMPT,
+            system_prompt=_SYSTEM_PROMPT.format(
+                gap_analysis=load_prompt(gap_prompt), output_type=output_type.__name__
+            ),
             output_retries=3,
         )
         @_advisor.tool
@@ -39,24 +51,19 @@ def get_advisor():
             Returns the complete semester-by-semester study plan for the student.
             Each item in the list is a SemesterPlan dict with semester_label, courses,
             total_credits, and is_final. Call this exactly once — do not call again.
-            Use the returned list directly as study_plan in AdvisorReport.
+            Use the returned list directly as study_plan in the report.
             """
-            import math
             from retrieval.src.retriever import agent as retriever_agent
+            from retrieval.src.scheduler import CAPSTONE_IDS, schedule_semesters
             from schemas.retrieval import extract_degree_abbr
 
-            _CAPSTONE_IDS = {
-                "BSBA": "BUS493", "BSCS": "CS494",
-                "MSCS": "CS595", "MSDS": "DS595", "MSEE": "EE595",
-            }
-
             completed_ids = {c.course_id for c in ctx.deps.transcript_data.completed}
             degree_abbr = extract_degree_abbr(ctx.deps.program_enrolled)
             is_master = any(p in ctx.deps.program_enrolled for p in ["MS", "MBA"])
             min_credits = 9 if is_master else 12
 
-            # ── 1. Call the retriever sub-agent to get the flat course list ──────
-            from retrieval.src.retriever import RetrieverDeps
+            # ── 1. Get the flat course list ─────────────────────────────────────
+            from retrieval.src.retriever import RetrieverDeps, aplan_courses
 
             # Extract student's current skills from resume for gap-based elective selection
             import json as _json
@@ -73,47 +80,34 @@ def get_advisor():
                 skill_benchmark=ctx.deps.skill_benchmark,
                 student_skills=student_skills,
             )
-            user_prompt = (
-                f"enrolled_program: {ctx.deps.program_enrolled}\n"
-                f"completed_courses: {sorted(completed_ids)}\n"
-                f"credits_remaining: {ctx.deps.credits_remaining}\n"
-                f"skill_benchmark: {ctx.deps.skill_benchmark}\n"
-            )
-            result = await retriever_agent().run(user_prompt, deps=retriever_deps)
-            # Retriever output_type=list[dict] — already parsed and validated
+            if settings.course_planner == "llm":
+                # Opt-in: have the retriever sub-agent call the same planner.
+                user_prompt = (
+                    f"enrolled_program: {ctx.deps.program_enrolled}\n"
+                    f"completed_courses: {sorted(completed_ids)}\n"
+                    f"credits_remaining: {ctx.deps.credits_remaining}\n"
+                    f"skill_benchmark: {ctx.deps.skill_benchmark}\n"
+                )
+                result = await retriever_agent().run(user_prompt, deps=retriever_deps)
+                planned = result.output or []
+            else:
+                # Default: run the planner directly — no LLM round trip.
+                planned = [c.model_dump() for c in await aplan_courses(retriever_deps)]
             # Safety net: strip any completed courses that slipped through
             courses: list[dict] = [
-                c for c in (result.output or [])
+                c for c in planned
                 if c.get("course_id") not in completed_ids
             ]
 
             print(f"\n[search_courses] Retriever returned {len(courses)} courses")
 
-            # ── 2. Separate capstone from the rest ──────────────────────────────
-            capstone_id = _CAPSTONE_IDS.get(degree_abbr)
-            capstone = [c for c in courses if c.get("course_id") == capstone_id]
-            non_capstone = [c for c in courses if c.get("course_id") != capstone_id]
-
-            # ── 3. Greedy semester packing ──────────────────────────────────────
-            total_credits = sum(float(c.get("credits", 3)) for c in courses)
-            n_semesters = max(1, math.ceil(total_credits / min_credits))
-            semesters: list[list[dict]] = [[] for _ in range(n_semesters)]
-            sem_credits: list[float] = [0.0] * n_semesters
-
-            sem_idx = 0
-            for course in non_capstone:
-                cr = float(course.get("credits", 3))
-                semesters[sem_idx].append(course)
-                sem_credits[sem_idx] += cr
-                if sem_credits[sem_idx] >= min_credits and sem_idx < n_semesters - 1:
-                    sem_idx += 1
-
-            # Always place capstone in the final semester
-            for c in capstone:
-                semesters[-1].append(c)
-                sem_credits[-1] += float(c.get("credits", 3))
-
-            # ── 4. Build SemesterPlan dicts ─────────────────────────────────────
+            # ── 2. Prerequisite-aware semester packing, capstone last ───────────
+            semesters = schedule_semesters(
+                courses, min_credits, capstone_id=CAPSTONE_IDS.get(degree_abbr)
+            ) or [[]]
+            sem_credits = [sum(float(c.get("credits", 3)) for c in sem) for sem in semesters]
+
+            # ── 3. Build SemesterPlan dicts ─────────────────────────────────────
             study_plan = []
             total = len(semesters)
             for i, (sem_courses, s_credits) in enumerate(zip(semesters, sem_credits)):
@@ -134,23 +128,19 @@ def get_advisor():
         async def search_events(
             ctx: RunContext[OrchestratorDeps], query: str
         ) -> list[dict]:
-            """Live web search for professional events via Serper API."""
+            """
+            Live web search for professional events via Serper API. Returns the
+            top upcoming events, de-duplicated and ranked against skill_benchmark,
+            each with title, url, date (ISO, or null if unknown), location,
+            organiser and a short snippet.
+            """
             if not ctx.deps.search_api_key:
                 return []
-            try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    resp = await client.post(
-                        "https://google.serper.dev/search",
-                        headers={"X-API-KEY": ctx.deps.search_api_key},
-                        json={"q": query, "num": 10},
-                    )
-                    resp.raise_for_status()
-                    return resp.json().get("organic", [])
-            except httpx.HTTPStatusError as e:
-                raise RuntimeError(
-                    f"Serper API error {e.response.status_code}: {e.response.text}"
-                ) from e
-            except httpx.RequestError as e:
-                raise RuntimeError(f"Serper API request failed: {e}") from e
+            from ai.event_ranking import rank_events
+            from ai.event_search import search_events as _search_events
+            from retrieval.src.vector_store import run_blocking
+
+            results = await _search_events(query, ctx.deps.search_api_key)
+            return await run_blocking(rank_events, results, ctx.deps.skill_benchmark)
 
     return _advisor
@@ -0,0 +1,190 @@
+"""
+Local ranking of event search results before they reach the advisor LLM.
+
+Serper returns web pages, not events. rank_events() turns the merged organic
+results into a short list of event candidates:
+
+  - the event date and location are parsed from the title and snippet
+    ("Thu, Nov 12, 2026", "2026-11-12", "San Francisco, CA", "Online"),
+  - results dated in the past and duplicates (same URL, or the same title on
+    the same date listed by several sites) are dropped,
+  - relevance is the cosine similarity between the event text and the best
+    matching skill_benchmark skills (one batched embedding call), plus small
+    bonuses for a Bay Area / online location and a date within HORIZON_DAYS,
+  - only the top settings.event_top_n candidates are returned, as compact
+    dicts (title, url, date, location, organiser, short snippet).
+
+The LLM then reads a handful of pre-parsed candidates instead of every raw
+result, and copies dates instead of guessing them.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from ai.event_search import url_key
+from config import settings
+from retrieval.src.embeddings import EmbeddingProvider, embed_texts, get_embedder, normalize_rows
+
+HORIZON_DAYS = 60            # events within this many days get DATE_BONUS
+PAST_GRACE_DAYS = 60         # a date without a year this far back means next year
+LOCATION_BONUS = 0.1
+DATE_BONUS = 0.1
+TOP_SKILLS = 3               # relevance = mean similarity of the best-matching skills
+SNIPPET_CHARS = 160
+
+BAY_AREA = (
+    "San Francisco", "South San Francisco", "Oakland", "Berkeley", "San Jose",
+    "Palo Alto", "Mountain View", "Sunnyvale", "Santa Clara", "Redwood City",
+    "Menlo Park", "Fremont", "Hayward", "Cupertino", "San Mateo", "Bay Area",
+)
+_ONLINE = re.compile(r"\b(online|virtual|webinar|livestream)\b", re.IGNORECASE)
+_CITY_STATE = re.compile(r"\b([A-Z][a-z]+(?: [A-Z][a-z]+)*),\s*(?:CA|California)\b")
+
+_MONTHS = {
+    m: i for i, names in enumerate(
+        [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+         ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+         ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+         ("dec", "december")],
+        start=1,
+    ) for m in names
+}
+_MONTH = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_DATE_PATTERNS = [
+    # 2026-11-12
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), ("y", "m", "d")),
+    # 11/12/2026
+    (re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b"), ("m", "d", "y")),
+    # Nov 12, 2026 / November 12
+    (re.compile(rf"\b({_MONTH})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b", re.I),
+     ("mon", "d", "y")),
+    # 12 Nov 2026 / 12 November
+    (re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH})\.?(?:,?\s+(\d{{4}}))?\b", re.I),
+     ("d", "mon", "y")),
+]
+
+
+@dataclass
+class EventCandidate:
+    title: str
+    url: str
+    snippet: str
+    organiser: str
+    date: date | None
+    location: str | None
+    score: float = 0.0
+
+    def compact(self) -> dict:
+        return {
+            "title": self.title,
+            "url": self.url,
+            "date": self.date.isoformat() if self.date else None,
+            "location": self.location,
+            "organiser": self.organiser,
+            "snippet": self.snippet[:SNIPPET_CHARS],
+        }
+
+
+def parse_event_date(text: str, today: date) -> date | None:
+    """First date mentioned in text; a date without a year is taken as the next occurrence."""
+    found = []
+    for pattern, fields in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            parts = dict(zip(fields, match.groups()))
+            month = _MONTHS[parts["mon"].lower()] if "mon" in parts else int(parts["m"])
+            year = int(parts["y"]) if parts.get("y") else None
+            try:
+                value = date(year or today.year, month, int(parts["d"]))
+            except ValueError:
+                continue
+            if year is None and value < today - timedelta(days=PAST_GRACE_DAYS):
+                value = value.replace(year=today.year + 1)
+            found.append((match.start(), value))
+    return min(found)[1] if found else None
+
+
+def parse_location(text: str) -> str | None:
+    """'Online', a Bay Area city, another 'City, CA', or None."""
+    for city in sorted(BAY_AREA, key=len, reverse=True):
+        if re.search(rf"\b{city}\b", text, re.IGNORECASE):
+            return city
+    match = _CITY_STATE.search(text)
+    if match:
+        return match.group(1)
+    if _ONLINE.search(text):
+        return "Online"
+    return None
+
+
+def _title_key(title: str) -> str:
+    # "Data Summit 2026 | Eventbrite" and "Data Summit 2026 - Meetup" are one event.
+    title = re.split(r"\s+[|–—-]\s+", title)[0]
+    return " ".join(re.findall(r"[a-z0-9]+", title.casefold()))
+
+
+def _candidates(results: list[dict], today: date) -> list[EventCandidate]:
+    candidates, seen_urls, seen_titles = [], set(), set()
+    for item in results:
+        url = item.get("link") or ""
+        title = item.get("title") or ""
+        if not url or not title:
+            continue
+        text = f"{title} {item.get('snippet', '')}"
+        when = parse_event_date(text, today)
+        if when is not None and when < today:
+            continue
+        title_key = (_title_key(title), when)
+        if url_key(url) in seen_urls or title_key in seen_titles:
+            continue
+        seen_urls.add(url_key(url))
+        seen_titles.add(title_key)
+        candidates.append(EventCandidate(
+            title=title,
+            url=url,
+            snippet=" ".join((item.get("snippet") or "").split()),
+            organiser=urlsplit(url).netloc.removeprefix("www."),
+            date=when,
+            location=parse_location(text),
+        ))
+    return candidates
+
+
+def rank_events(
+    results: list[dict],
+    skill_benchmark: list[str],
+    today: date | None = None,
+    top_n: int | None = None,
+    embedder: EmbeddingProvider | None = None,
+) -> list[dict]:
+    """Top upcoming, de-duplicated events for the skills, best first, in compact form."""
+    today = today or datetime.now().date()
+    top_n = settings.event_top_n if top_n is None else top_n
+    candidates = _candidates(results, today)
+    if not candidates:
+        return []
+
+    skills = list(dict.fromkeys(skill_benchmark))
+    if skills:
+        texts = [f"{c.title}. {c.snippet}" for c in candidates]
+        vectors = normalize_rows(embed_texts(skills + texts, embedder or get_embedder()))
+        similarity = vectors[len(skills):] @ vectors[:len(skills)].T   # events × skills
+        k = min(TOP_SKILLS, len(skills))
+        relevance = -np.sort(-similarity, axis=1)[:, :k].mean(axis=1)
+    else:
+        relevance = np.zeros(len(candidates), dtype=np.float32)
+
+    horizon = today + timedelta(days=HORIZON_DAYS)
+    for c, r in zip(candidates, relevance):
+        c.score = float(r)
+        if c.location in BAY_AREA or c.location == "Online":
+            c.score += LOCATION_BONUS
+        if c.date is not None and c.date <= horizon:
+            c.score += DATE_BONUS
+    candidates.sort(key=lambda c: -c.score)   # stable: keeps search order on ties
+    return [c.compact() for c in candidates[:top_n]]
@@ -0,0 +1,210 @@
+"""
+Event search for Agent 2 — Serper web search, pooled, cached and fanned out.
+
+  - One keep-alive httpx.AsyncClient per event loop, reused by every call, so
+    repeated searches skip the TCP/TLS handshake. run_uniflow() closes it
+    before its loop ends (app/runner.py runs each request on a fresh loop).
+  - A SQLite response cache under vector_db/, keyed by (endpoint, normalized
+    query); entries expire after settings.event_cache_ttl seconds (event
+    listings for a city/role change over hours, not seconds). Cache reads and
+    writes run in a worker thread (asyncio.to_thread), off the event loop and
+    off the retrieval pool.
+  - Each search fans out to a few query variants ("… meetup", "… workshop")
+    concurrently and merges the results, dropping duplicate URLs.
+  - settings.serper_endpoint selects the endpoint, so a local stand-in server
+    can replace Serper in tests and benchmarks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import settings
+from retrieval.src.embedding_cache import normalize_text
+
+EVENT_CACHE_PATH = "vector_db/event_cache.sqlite3"
+EVENT_QUERY_SUFFIXES = ("", "meetup", "workshop", "career fair")
+RESULTS_PER_QUERY = 10
+
+# ── HTTP client pool ──────────────────────────────────────────────────────────
+
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The keep-alive client of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_http_client():
+    """Close the running loop's client (call before the loop shuts down)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# ── Response cache ────────────────────────────────────────────────────────────
+
+
+class EventSearchCache:
+    def __init__(self, path: str | None = EVENT_CACHE_PATH, ttl: float | None = None):
+        self.path = path
+        self.ttl = settings.event_cache_ttl if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _db(self) -> sqlite3.Connection | None:
+        # Caller must hold _lock.
+        if self.path is None or self.ttl <= 0:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, results TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key(endpoint: str, query: str) -> str:
+        text = f"{endpoint}\0{normalize_text(query).casefold()}\0{RESULTS_PER_QUERY}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> list[dict] | None:
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT results, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            return json.loads(row[0])
+
+    def put(self, key: str, results: list[dict]):
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, results, created) VALUES (?, ?, ?)",
+                (key, json.dumps(results), time.time()),
+            )
+            conn.commit()
+
+
+_cache: EventSearchCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_event_cache() -> EventSearchCache:
+    """Return the process-wide event search cache, creating it on first call."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EventSearchCache()
+        return _cache
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+
+def query_variants(query: str, n: int | None = None) -> list[str]:
+    """The query plus event-type variants, skipping suffixes it already contains."""
+    n = settings.event_query_variants if n is None else n
+    query = normalize_text(query)
+    variants = [
+        f"{query} {suffix}".strip() for suffix in EVENT_QUERY_SUFFIXES
+        if not suffix or suffix not in query.casefold()
+    ]
+    return variants[:max(1, n)]
+
+
+def url_key(url: str) -> str:
+    """URL identity for dedup: host without www, path without trailing slash."""
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc.casefold().removeprefix('www.')}{parts.path.rstrip('/')}"
+
+
+async def _search_one(query: str, api_key: str, cache: EventSearchCache) -> list[dict]:
+    key = cache.key(settings.serper_endpoint, query)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        return cached
+    try:
+        resp = await get_http_client().post(
+            settings.serper_endpoint,
+            headers={"X-API-KEY": api_key},
+            json={"q": query, "num": RESULTS_PER_QUERY},
+        )
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise RuntimeError(
+            f"Serper API error {e.response.status_code}: {e.response.text}"
+        ) from e
+    except httpx.RequestError as e:
+        raise RuntimeError(f"Serper API request failed: {e}") from e
+    results = resp.json().get("organic", [])
+    await asyncio.to_thread(cache.put, key, results)
+    return results
+
+
+async def search_events(
+    query: str, api_key: str, variants: int | None = None
+) -> list[dict]:
+    """
+    Organic Serper results for query and its variants, merged in variant order
+    with duplicate URLs removed. Raises RuntimeError only if every variant fails.
+    """
+    cache = get_event_cache()
+    queries = query_variants(query, variants)
+    responses = await asyncio.gather(
+        *(_search_one(q, api_key, cache) for q in queries), return_exceptions=True
+    )
+    failures = [r for r in responses if isinstance(r, BaseException)]
+    if len(failures) == len(responses):
+        raise failures[0]
+    for q, r in zip(queries, responses):
+        if isinstance(r, BaseException):
+            print(f"[search_events] Variant {q!r} failed: {r}")
+
+    merged, seen = [], set()
+    for results in responses:
+        if isinstance(results, BaseException):
+            continue
+        for item in results:
+            url = item.get("link") or ""
+            key = url_key(url) if url else None
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)
+            merged.append(item)
+    return merged
@@ -0,0 +1,176 @@
+"""
+Local gap scoring — the numeric GapReport fields without an LLM call.
+
+score_gap() rates every benchmark skill (PositionProfile.must_have, weight 2;
+nice_to_have, weight 1) against the student's evidence with the rubric the
+advisor prompt used to ask the LLM for:
+
+  - 0.5  weak evidence: listed in ResumeData.skills or certifications, or taught
+         by a completed course (its title or one of its catalog skills),
+  - 0.75 moderate evidence: applied in a work-experience highlight,
+  - 1.0  strong evidence: a highlight with a measurable result (a percentage,
+         an amount of money, "3x", or a number of users, hours, GB, …; not a
+         version number or a year), or two or more highlights applying the skill.
+
+A skill matches a piece of evidence when their canonical names contain one
+another as whole words (skill_ontology.py; punctuation between words is
+dropped, so "SQL," in a sentence still matches) or their embeddings are
+close: all skills and evidence texts are embedded in one batch and compared as one
+skills × evidence similarity matrix. benchmark_score is the weighted mean of
+the points, capped at 78 with fewer than two strong skills and at 70 without
+any measurable impact, as in the prompt. The advisor LLM then only writes the
+narrative fields (GapNarrative), and the orchestrator assembles the GapReport.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from retrieval.src.catalog import get_catalog
+from retrieval.src.embeddings import EmbeddingProvider, embed_texts, get_embedder, normalize_rows
+from retrieval.src.skill_ontology import canonical_skill, get_skill_ontology
+from schemas.agent1 import PositionProfile
+from schemas.agent2 import GapNarrative, GapReport
+from schemas.inputs import ResumeData, TranscriptData
+
+SKILL_MATCH_THRESHOLD = 0.5   # cosine similarity for skill ↔ evidence text (tune per model)
+MUST_HAVE_WEIGHT = 2.0
+NICE_TO_HAVE_WEIGHT = 1.0
+MATCHED_POINTS = 0.5          # at least weak evidence counts as matched
+
+WEAK, MODERATE, STRONG = 0.5, 0.75, 1.0
+
+_NUMBER = r"\d+(?:[.,]\d+)*"
+_SCALE = r"(?:\s*(?:k|m|bn?|thousand|million|billion))?"
+_COUNT_NOUNS = (
+    "users?|customers?|clients?|people|students?|employees?|members?|visitors?|"
+    "subscribers?|accounts?|orders?|transactions?|records?|rows?|requests?|queries|"
+    "tickets?|leads?|downloads?|sessions?|stores?|countries|markets?|"
+    "ms|milliseconds?|seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|months?|"
+    "kb|mb|gb|tb|pb|qps|rps|tps"
+)
+# A number that states a result: 40%, $2M, 3x, 10k users, 12 hours. A bare
+# number ("Python 3", "Java 8 services", "2023") is not one.
+_MEASURABLE = re.compile(
+    rf"{_NUMBER}\s*(?:%|percent\b|pp\b)"
+    rf"|[$€£]\s*{_NUMBER}"
+    rf"|\b{_NUMBER}\s*x\b"
+    rf"|\b{_NUMBER}{_SCALE}\+?\s*(?:{_COUNT_NOUNS})\b",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+
+@dataclass
+class GapScore:
+    benchmark_score: int
+    matched_skills: list[str]
+    missing_skills: list[str]
+    top_gap: str
+    points: dict[str, float] = field(default_factory=dict)   # skill → 0 / 0.5 / 0.75 / 1
+
+    def to_report(self, narrative: GapNarrative) -> GapReport:
+        return GapReport(
+            benchmark_score=self.benchmark_score,
+            matched_skills=self.matched_skills,
+            missing_skills=self.missing_skills,
+            top_gap=self.top_gap,
+            **narrative.model_dump(),
+        )
+
+
+def _words(key: str) -> str:
+    # "built dashboards in tableau, python and sql." → "built dashboards in tableau python and sql"
+    return " ".join(_WORD.findall(key))
+
+
+def _mentions(text: str, skill: str, both_ways: bool) -> bool:
+    if f" {skill} " in f" {text} ":
+        return True
+    return both_ways and f" {text} " in f" {skill} "
+
+
+def _evidence(
+    resume: ResumeData, transcript: TranscriptData | None
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """(texts, evidence level per text, True where the text is a work highlight)."""
+    texts, levels, highlight = [], [], []
+
+    def add(text: str, level: float, is_highlight: bool = False):
+        if text.strip():
+            texts.append(text)
+            levels.append(level)
+            highlight.append(is_highlight)
+
+    for skill in resume.skills + resume.certifications:
+        add(skill, WEAK)
+    if transcript is not None:
+        catalog = get_catalog()
+        for course in transcript.completed:
+            record = catalog.get(course.course_id) or {}
+            for label in [course.title, *record.get("skills_taught", [])]:
+                add(label, WEAK)
+    for job in resume.work_experience:
+        for line in job.highlights:
+            add(line, STRONG if _MEASURABLE.search(line) else MODERATE, True)
+    return texts, np.array(levels, dtype=np.float32), np.array(highlight, dtype=bool)
+
+
+def score_gap(
+    resume: ResumeData,
+    profile: PositionProfile,
+    transcript: TranscriptData | None = None,
+    embedder: EmbeddingProvider | None = None,
+) -> GapScore:
+    """Matched / missing skills, benchmark score and top gap for one student."""
+    skills = list(dict.fromkeys(profile.must_have))
+    skills += [s for s in dict.fromkeys(profile.nice_to_have) if s not in skills]
+    weights = np.array(
+        [MUST_HAVE_WEIGHT if s in profile.must_have else NICE_TO_HAVE_WEIGHT for s in skills],
+        dtype=np.float32,
+    )
+    if not skills:
+        return GapScore(0, [], [], "")
+    texts, levels, highlight = _evidence(resume, transcript)
+
+    ontology = get_skill_ontology()
+    skill_keys = [_words(k) for k in ontology.normalize_many(skills, embedder)]
+    # Skill labels are normalized like the benchmark; sentences are only folded.
+    text_keys = [
+        _words(canonical_skill(t) if h else ontology.normalize(t))
+        for t, h in zip(texts, highlight)
+    ]
+    match = np.array(
+        [[_mentions(t, s, both_ways=not h) for t, h in zip(text_keys, highlight)]
+         for s in skill_keys],
+        dtype=bool,
+    ).reshape(len(skills), len(texts))
+    if texts:
+        vectors = normalize_rows(embed_texts(skills + texts, embedder or get_embedder()))
+        match |= vectors[:len(skills)] @ vectors[len(skills):].T >= SKILL_MATCH_THRESHOLD
+
+    points = (match * levels).max(axis=1, initial=0.0)
+    # The same skill applied in two or more highlights is strong evidence too.
+    points[(match & highlight).sum(axis=1) >= 2] = STRONG
+
+    score = 100 * float(points @ weights) / float(weights.sum())
+    if (points >= STRONG).sum() < 2:
+        score = min(score, 78)
+    if not (highlight & (levels >= STRONG)).any():
+        score = min(score, 70)
+
+    matched = [s for s, p in zip(skills, points) if p >= MATCHED_POINTS]
+    missing = [s for s, p in zip(skills, points) if p < MATCHED_POINTS]
+    # The two skills whose shortfall costs the most score (stable on ties).
+    deficit = weights * (1 - points)
+    top = [skills[i] for i in np.argsort(-deficit, kind="stable")[:2] if deficit[i] > 0]
+    return GapScore(
+        benchmark_score=round(score),
+        matched_skills=matched,
+        missing_skills=missing,
+        top_gap="\n".join(f"• {s}" for s in top),
+        points={s: float(p) for s, p in zip(skills, points)},
+    )
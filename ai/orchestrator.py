@@ -7,7 +7,9 @@ Phase 2+: each mock will be replaced with a real agent .run() call.
 from __future__ import annotations
 
 from ai.agents.deps import OrchestratorDeps
+from ai.event_search import aclose_http_client
 from ai.parse_document.parse import parse_resume, parse_transcript
+from config import settings
 from schemas.agent3 import InterviewResult
 from schemas.inputs import ResumeData, TranscriptData
 from schemas.report import FinalReport
@@ -48,6 +50,24 @@ async def run_uniflow(
     """
     Orchestrates the full UniFlow pipeline with degree-specific study plans.
     """
+    try:
+        return await _run_pipeline(
+            resume_pdf_path, transcript_pdf_path, target_position,
+            program_enrolled, credits_remaining, deps,
+        )
+    finally:
+        # Each request may run on its own event loop; close that loop's client.
+        await aclose_http_client()
+
+
+async def _run_pipeline(
+    resume_pdf_path,
+    transcript_pdf_path,
+    target_position: str,
+    program_enrolled: str,
+    credits_remaining: int,
+    deps: OrchestratorDeps,
+) -> FinalReport:
     # ── Step 0: Validation Logic ──────────────────────────────────────────────
     # Check caps based on the degree type prefix (BS vs MS/MBA)
     is_master = any(prefix in program_enrolled for prefix in ["MS", "MBA"])
@@ -90,6 +110,16 @@ async def run_uniflow(
 
     # ── Step 4: Agent 2 — Course & Event Advisor ──────────────────────────────
     from ai.agents.agent2 import get_advisor
+    from schemas.agent2 import AdvisorDraft, AdvisorReport
+
+    # Local gap scoring: the numeric GapReport fields are computed here and
+    # the advisor only writes the narrative around them.
+    gap_score = None
+    if settings.gap_scoring == "local":
+        from ai.gap_scoring import score_gap
+        from retrieval.src.vector_store import run_blocking
+
+        gap_score = await run_blocking(score_gap, resume_data, position_profile, transcript_data)
 
     # We inject the study plan data here so the advisor knows the constraints
     agent2_prompt = (
@@ -101,9 +131,30 @@ async def run_uniflow(
         f"resume_text: {resume_data_json}\n"
         f"transcript_data: {transcript_data.model_dump_json()}\n"
     )
+    if gap_score is not None:
+        agent2_prompt += (
+            f"benchmark_score: {gap_score.benchmark_score}\n"
+            f"matched_skills: {gap_score.matched_skills}\n"
+            f"missing_skills: {gap_score.missing_skills}\n"
+            f"top_gap: {gap_score.top_gap}\n"
+        )
 
     agent2_result = await get_advisor().run(agent2_prompt, deps=deps)
     advisor_report = agent2_result.output
+    if isinstance(advisor_report, AdvisorDraft):
+        if gap_score is None:   # gap_scoring changed after the advisor was created
+            from ai.gap_scoring import score_gap
+            from retrieval.src.vector_store import run_blocking
+
+            gap_score = await run_blocking(
+                score_gap, resume_data, position_profile, transcript_data
+            )
+        advisor_report = AdvisorReport(
+            gap_report=gap_score.to_report(advisor_report.gap_narrative),
+            study_plan=advisor_report.study_plan,
+            event_recs=advisor_report.event_recs,
+            calendar_push_ready=advisor_report.calendar_push_ready,
+        )
 
     # ── Step 5: Agent 3 — Interview Coach ─────────────────────────────────────
     from ai.agents.agent3 import evaluate_answer, generate_question
@@ -12,7 +12,7 @@ from app.panels.benchmark import render_benchmark
 from app.panels.courses import render_courses
 from app.panels.events import render_events
 from app.panels.interview import render_interview_chat
-from app.runner import run_analysis, run_async
+from app.runner import run_analysis, run_async, warm_up_models
 from app.sidebar import render_sidebar
 
 
@@ -21,6 +21,7 @@ def run_app() -> None:
     # ── 1. Page setup (must be first st call) ─────────────────────────────────
     configure_page()
     inject_css()
+    warm_up_models()
 
     # ── 2. Sidebar inputs ─────────────────────────────────────────────────────
     inputs = render_sidebar()
@@ -2,6 +2,7 @@
 app/runner.py — Shared async helpers and dependency builder.
 
 run_async()       — runs an async coroutine on a background thread (Streamlit-safe).
+warm_up_models()  — loads local embedding / re-ranking models once per process.
 build_stub_deps() — builds OrchestratorDeps until real ChromaDB + Calendar are wired.
 """
 
@@ -11,6 +12,7 @@ import asyncio
 import os
 import tempfile
 from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from ai.agents.deps import OrchestratorDeps
 from ai.orchestrator import run_uniflow
@@ -27,6 +29,22 @@ def run_async(coro):
     return _pool.submit(asyncio.run, coro).result()
 
 
+@lru_cache(maxsize=1)
+def warm_up_models() -> None:
+    """
+    Load the local models at startup so the first request does not pay for it
+    (a cold cross-encoder would also spend the whole re-rank budget loading).
+    """
+    if settings.embedding_provider == "local":
+        from retrieval.src.embeddings import warm_up
+
+        warm_up()
+    if settings.rerank_enabled:
+        from retrieval.src.rerank import get_reranker
+
+        get_reranker()   # creates and warms the shared reranker
+
+
 def build_stub_deps() -> OrchestratorDeps:
     """
     Stub dependencies — no real ChromaDB or Calendar service wired yet.
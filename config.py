@@ -38,10 +38,58 @@ class Settings(BaseSettings):
 
     serper_api_key: str = os.getenv("SERPER_API_KEY")
     """Required for live event search in Agent 2 (Phase 4+)."""
+    serper_endpoint: str = os.getenv("SERPER_ENDPOINT", "https://google.serper.dev/search")
+    """Event search endpoint; point it at a local stand-in server for tests and benchmarks."""
 
     logfire_token: str
     """Required for Logfire integration."""
 
+    # ── Retrieval ───────────────────────────────────────────────────────────────
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    """Embedding backend for the vector store. One of:
+       'openai'   OpenAI embeddings API (needs OPENAI_API_KEY)
+       'local'    sentence-transformers on CPU, fully offline after download
+       'hashing'  deterministic hashing vectors, for tests and offline runs
+    """
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "")
+    """Model name for the embedding provider. Empty = provider default."""
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "vector")
+    """Course search mode: 'vector' | 'lexical' (BM25) | 'hybrid' (both, rank-fused)."""
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma")
+    """'chroma' (HNSW, persistent client) or 'numpy' (exact brute force, small catalogs)."""
+    vector_mmap: bool = os.getenv("VECTOR_MMAP", "false").lower() in ("1", "true", "yes")
+    """numpy backend only: memory-map the embedding matrix instead of loading it."""
+    vector_dtype: str = os.getenv("VECTOR_DTYPE", "float32")
+    """numpy backend only: resident vector precision — 'float32', 'float16' or 'int8'."""
+    vector_rescore: int = int(os.getenv("VECTOR_RESCORE", 4))
+    """numpy backend only: re-rank the top k × N quantized hits on float32 rows. 0 = off."""
+    query_cache_ttl: float = float(os.getenv("QUERY_CACHE_TTL", 600))
+    """Seconds a cached vector-store query result stays valid. 0 disables the cache."""
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+    """Maximum number of cached query results (least recently used are evicted)."""
+    rerank_enabled: bool = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+    """Re-rank course candidates with a local cross-encoder (needs sentence-transformers)."""
+    rerank_model: str = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    """sentence-transformers CrossEncoder model used for re-ranking."""
+    rerank_budget_ms: float = float(os.getenv("RERANK_BUDGET_MS", 250))
+    """Latency budget per re-rank call; past it, candidates keep their embedding order."""
+    course_planner: str = os.getenv("COURSE_PLANNER", "direct")
+    """How Agent 2 builds the course list: 'direct' (plan_courses in Python) or
+       'llm' (retriever sub-agent calls the same planner and echoes its output).
+    """
+    gap_scoring: str = os.getenv("GAP_SCORING", "local")
+    """How GapReport scores are produced: 'local' (ai/gap_scoring.py; the advisor LLM
+       writes only the narrative fields) or 'llm' (the advisor LLM scores the gap too).
+    """
+
+    # ── Event search ────────────────────────────────────────────────────────────
+    event_cache_ttl: float = float(os.getenv("EVENT_CACHE_TTL", 6 * 3600))
+    """Seconds a cached event search response stays valid. 0 disables the cache."""
+    event_query_variants: int = int(os.getenv("EVENT_QUERY_VARIANTS", 3))
+    """Query variants searched concurrently per search_events call (1 = the query only)."""
+    event_top_n: int = int(os.getenv("EVENT_TOP_N", 5))
+    """Ranked event candidates passed to the advisor LLM per search_events call."""
+
 
 # Singleton — import this everywhere instead of instantiating Settings() yourself.
 settings = Settings()
@@ -0,0 +1,105 @@
+"""
+Recall / latency / memory benchmark for quantized NumpyCollection storage.
+
+Embeds every course in courses.json with the configured embedding provider,
+uses each course's skills as a query, and compares float16 / int8 storage,
+with and without exact rescoring, against float32 exact search. Every
+collection is directory-backed and memory-mapped, as vector_store opens them,
+and "resident KB" is NumpyCollection.nbytes: the bytes actually held in memory,
+including any float32 copy (the mapped float32 file is not).
+
+    python -m retrieval.src.bench_quantization --k 10 --replicas 20
+
+--replicas tiles the catalog (with small noise) to mimic hosting several
+catalogs in one process. Run with EMBEDDING_PROVIDER=hashing for an offline run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from retrieval.src.catalog import get_catalog
+from retrieval.src.embeddings import embed_texts
+from retrieval.src.numpy_backend import NumpyCollection
+from schemas.retrieval import record_to_text
+
+CONFIGS = [
+    ("float32", 0),
+    ("float16", 0),
+    ("float16", 4),
+    ("int8", 0),
+    ("int8", 4),
+]
+
+
+def _corpus(replicas: int, seed: int = 0) -> tuple[list[str], np.ndarray, np.ndarray]:
+    records = list(get_catalog())
+    vectors = np.asarray(embed_texts([record_to_text(r) for r in records]), dtype=np.float32)
+    queries = np.asarray(
+        embed_texts([", ".join(r.get("skills_taught", [])) or r["title"] for r in records]),
+        dtype=np.float32,
+    )
+    rng = np.random.default_rng(seed)
+    ids, blocks = [], []
+    for copy in range(replicas):
+        noise = 0.0 if copy == 0 else rng.normal(scale=0.02, size=vectors.shape)
+        blocks.append(vectors + noise)
+        ids.extend(f"{r['course_id']}#{copy}" for r in records)
+    return ids, np.vstack(blocks).astype(np.float32), queries
+
+
+def run(k: int = 10, replicas: int = 1, repeats: int = 5) -> list[dict]:
+    ids, matrix, queries = _corpus(replicas)
+    baseline = None
+    rows = []
+    for dtype, rescore in CONFIGS:
+        with tempfile.TemporaryDirectory() as tmp:
+            col = NumpyCollection("bench", directory=tmp, mmap=True, dtype=dtype, rescore=rescore)
+            col.upsert(ids=ids, embeddings=matrix)
+            col.query(query_embeddings=queries[:1], n_results=k, include=[])   # warm up
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = col.query(query_embeddings=queries, n_results=k, include=[])
+            elapsed = (time.perf_counter() - start) / repeats
+            resident = col.nbytes
+        if baseline is None:
+            baseline = result["ids"]
+        recall = np.mean([
+            len(set(got) & set(want)) / len(want)
+            for got, want in zip(result["ids"], baseline)
+        ])
+        rows.append({
+            "dtype": dtype,
+            "rescore": rescore,
+            "resident_kb": resident / 1024,
+            "ms_per_query": 1000 * elapsed / len(queries),
+            f"recall@{k}": float(recall),
+        })
+    return rows
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rows = run(args.k, args.replicas, args.repeats)
+    print(
+        f"{'dtype':<8} {'rescore':>7} {'resident KB':>12} {'ms/query':>9} "
+        f"{'recall@' + str(args.k):>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['dtype']:<8} {row['rescore']:>7} {row['resident_kb']:>12.1f} "
+            f"{row['ms_per_query']:>9.4f} {row[f'recall@{args.k}']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
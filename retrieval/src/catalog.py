@@ -0,0 +1,103 @@
+"""
+Compiled course catalog — course_id → full course record, loaded once per process.
+
+The vector store only needs to return ids and scores for course hits; records
+are joined from here in O(1) instead of being stored as JSON in Chroma
+metadata and deserialized on every query.
+
+Course codes are compared in normalized form ("CS-305", "cs305" → "CS305")
+because courses.json and requirements.json spell the same code differently.
+A lab is its lecture's code plus "L" (undergraduate) or "LG" (graduate).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from schemas.retrieval import QueryHit
+
+COURSES_PATH = Path(__file__).resolve().parents[1] / "data" / "processed" / "courses.json"
+REQUIREMENTS_PATH = COURSES_PATH.parent / "requirements.json"
+
+
+def normalize_course_code(code: str) -> str:
+    """Canonical form of a course code: uppercase alphanumerics only."""
+    return re.sub(r"[^A-Z0-9]", "", code.upper())
+
+
+_LAB = re.compile(r"(.*\d)(LG|L)")
+
+
+def lab_lectures(code: str) -> tuple[str, ...] | None:
+    """
+    Normalized codes the lecture of a lab may have ("CS350L" → ("CS350",),
+    "CS457LG" → ("CS457G", "CS457")), or None if code is not a lab.
+    """
+    match = _LAB.fullmatch(normalize_course_code(code))
+    if match is None:
+        return None
+    base, suffix = match.groups()
+    return (base,) if suffix == "L" else (f"{base}G", base)
+
+
+def lab_family(code: str) -> str | None:
+    """The shared key of the L and LG versions of a lab ("CS457L", "CS457LG" → "CS457")."""
+    match = _LAB.fullmatch(normalize_course_code(code))
+    return match.group(1) if match else None
+
+
+class CourseCatalog:
+    def __init__(self, records: list[dict]):
+        self.records = records
+        self._by_code = {normalize_course_code(r["course_id"]): r for r in records}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, course_id: str) -> bool:
+        return normalize_course_code(course_id) in self._by_code
+
+    def get(self, course_id: str) -> dict | None:
+        return self._by_code.get(normalize_course_code(course_id))
+
+    def join(self, hits: list[QueryHit]) -> list[dict]:
+        """Resolve id-only vector hits to course records, dropping unknown ids."""
+        records = []
+        for hit in hits:
+            record = self.get(hit.id)
+            if record is not None:
+                records.append(record)
+        return records
+
+
+@lru_cache(maxsize=None)
+def get_catalog(path: str | Path = COURSES_PATH) -> CourseCatalog:
+    """Return the compiled catalog for a courses.json file, loading it on first call."""
+    with open(path) as f:
+        return CourseCatalog(json.load(f))
+
+
+def get_degree_membership(path: str | Path = REQUIREMENTS_PATH) -> dict[str, frozenset[str]]:
+    """Normalized course code → abbreviations of the degrees whose requirements list it."""
+    from retrieval.src.requirements import get_requirements  # imports this module
+
+    return get_requirements(path).membership
+
+
+def course_metadata(record: dict) -> dict:
+    """Scalar metadata indexed with each course so filters run inside the vector index."""
+    code = normalize_course_code(record["course_id"])
+    meta = {
+        "course_code": code,
+        "department": record.get("department", ""),
+        "credits": float(record.get("credits", 3)),
+    }
+    for abbr in get_degree_membership().get(code, ()):
+        meta[f"deg_{abbr}"] = True
+    return meta
@@ -0,0 +1,196 @@
+"""
+Cohort planning — course plans for many students in one pass.
+
+plan_courses() runs two index searches per student. For a cohort (hundreds of
+transcripts) plan_cohort() replaces them with matrix arithmetic:
+
+  - course vectors come from embedding every catalog record once (the same
+    text the courses index holds, so the embedding cache serves them),
+  - each distinct position / elective query is embedded once, in one batch,
+    and scored against all courses with one matrix product,
+  - completed courses are masked out of the students × courses matrices in
+    one step,
+  - students on the same degree rank its selection courses with one argsort.
+
+The category loop and credit knapsacks are shared with plan_courses() through
+build_plan(), so a cohort plan differs from a single plan only in ranking:
+cosine similarity of the embeddings, without lexical search or re-ranking.
+
+    python -m retrieval.src.cohort transcripts.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from retrieval.src.catalog import CourseCatalog, get_catalog, normalize_course_code
+from retrieval.src.embeddings import EmbeddingProvider, embed_texts, get_embedder, normalize_rows
+from retrieval.src.requirements import get_requirements
+from retrieval.src.retriever import (
+    ELECTIVE_CANDIDATES,
+    RetrieverDeps,
+    build_plan,
+    student_queries,
+)
+from schemas.agent2 import CourseRecommendation
+from schemas.retrieval import QueryHit, record_to_text
+
+
+@dataclass
+class CohortResult:
+    plans: list[list[CourseRecommendation]]   # one per student, in input order
+    elapsed: float                            # seconds
+
+    @property
+    def plans_per_second(self) -> float:
+        return len(self.plans) / self.elapsed if self.elapsed > 0 else float("inf")
+
+
+class CourseMatrix:
+    """Unit-normalized course embeddings, one row per catalog course."""
+
+    def __init__(self, catalog: CourseCatalog, embedder: EmbeddingProvider):
+        records = list(catalog)
+        self.ids = [r["course_id"] for r in records]
+        self.index = {normalize_course_code(id_): i for i, id_ in enumerate(self.ids)}
+        self.vectors = normalize_rows(embed_texts([record_to_text(r) for r in records], embedder))
+
+    def columns(self, codes) -> np.ndarray:
+        """Column indexes of the given course codes, in catalog order."""
+        return np.array(
+            sorted(self.index[normalize_course_code(c)] for c in codes
+                   if normalize_course_code(c) in self.index),
+            dtype=np.intp,
+        )
+
+
+_matrix: tuple[tuple, CourseMatrix] | None = None
+
+
+def get_course_matrix(embedder: EmbeddingProvider | None = None) -> CourseMatrix:
+    """Course matrix for the current catalog and embedding model, built once per pair."""
+    global _matrix
+    embedder = embedder or get_embedder()
+    catalog = get_catalog()
+    key = (id(catalog), embedder.model_name)
+    if _matrix is None or _matrix[0] != key:
+        _matrix = (key, CourseMatrix(catalog, embedder))
+    return _matrix[1]
+
+
+def relevance_matrix(
+    queries: list[str], courses: CourseMatrix, embedder: EmbeddingProvider | None = None
+) -> np.ndarray:
+    """queries × courses cosine similarities; each distinct query is embedded once."""
+    unique = list(dict.fromkeys(queries))
+    scores = normalize_rows(embed_texts(unique, embedder)) @ courses.vectors.T
+    row = {q: i for i, q in enumerate(unique)}
+    return scores[[row[q] for q in queries]]
+
+
+def completed_mask(deps_list: list[RetrieverDeps], courses: CourseMatrix) -> np.ndarray:
+    """students × courses boolean matrix, True where the student completed the course."""
+    mask = np.zeros((len(deps_list), len(courses.ids)), dtype=bool)
+    for i, deps in enumerate(deps_list):
+        mask[i, courses.columns(deps.completed_ids)] = True
+    return mask
+
+
+def _hits(courses: CourseMatrix, scores: np.ndarray, columns: np.ndarray) -> list[QueryHit]:
+    return [
+        QueryHit(id=courses.ids[j], distance=1.0 - float(scores[j]))
+        for j in columns if np.isfinite(scores[j])
+    ]
+
+
+def _top_columns(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def plan_cohort(
+    deps_list: list[RetrieverDeps], embedder: EmbeddingProvider | None = None
+) -> CohortResult:
+    """Plan every student's remaining courses; plans come back in input order."""
+    start = time.perf_counter()
+    embedder = embedder or get_embedder()
+    courses = get_course_matrix(embedder)
+    requirements = get_requirements()
+
+    queries = [student_queries(deps) for deps in deps_list]
+    completed = completed_mask(deps_list, courses)
+    position = relevance_matrix([q[0] for q in queries], courses, embedder)
+    elective = relevance_matrix([q[1] for q in queries], courses, embedder)
+    position[completed] = -np.inf
+    elective[completed] = -np.inf
+
+    # Students on the same degree rank its selection courses in one argsort.
+    by_degree: dict[str, list[int]] = {}
+    degrees = {}
+    for i, deps in enumerate(deps_list):
+        degree = requirements.lookup(deps.program_enrolled.strip())
+        if degree is not None:
+            by_degree.setdefault(degree.name, []).append(i)
+            degrees[degree.name] = degree
+    selection_hits: dict[int, list[QueryHit]] = {}
+    for name, rows in by_degree.items():
+        columns = courses.columns(degrees[name].selection_codes)
+        order = np.argsort(-position[np.ix_(rows, columns)], axis=1, kind="stable")
+        for row, ranked in zip(rows, columns[order]):
+            selection_hits[row] = _hits(courses, position[row], ranked)
+
+    plans: list[list[CourseRecommendation]] = []
+    for i, deps in enumerate(deps_list):
+        if i not in selection_hits:
+            plans.append([])
+            continue
+
+        def rank_electives(picked_ids: set[str], row=elective[i]) -> list[QueryHit]:
+            scores = row.copy()
+            scores[courses.columns(picked_ids)] = -np.inf
+            return _hits(courses, scores, _top_columns(scores, ELECTIVE_CANDIDATES))
+
+        degree = requirements.lookup(deps.program_enrolled.strip())
+        plans.append(build_plan(deps, degree, selection_hits[i], rank_electives))
+
+    result = CohortResult(plans=plans, elapsed=time.perf_counter() - start)
+    print(
+        f"[cohort] Planned {len(plans)} students in {result.elapsed:.2f}s "
+        f"({result.plans_per_second:.1f} plans/s)"
+    )
+    return result
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "transcripts",
+        help="JSON list of objects with RetrieverDeps fields "
+             "(program_enrolled, completed_ids, credits_remaining, ...)",
+    )
+    parser.add_argument("--output", help="write the plans here as JSON (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.transcripts) as f:
+        raw = json.load(f)
+    deps_list = [
+        RetrieverDeps(**{**r, "completed_ids": set(r.get("completed_ids", []))})
+        for r in raw
+    ]
+    result = plan_cohort(deps_list)
+    plans = [[c.model_dump() for c in plan] for plan in result.plans]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(plans, f, indent=2)
+    else:
+        print(json.dumps(plans, indent=2))
+
+
+if __name__ == "__main__":
+    main()
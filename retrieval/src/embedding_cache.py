@@ -0,0 +1,225 @@
+"""
+Two-tier embedding cache for retrieval.
+
+  - Tier 1: in-memory LRU of recently used vectors (per process).
+  - Tier 2: SQLite file under vector_db/ that survives restarts and is shared
+    by every process using the same vector_db directory.
+
+Entries are keyed by (embedding model, normalized text), so the same
+position query issued for many students is embedded through the API once.
+The disk tier is bounded by total vector bytes; least-recently-used rows are
+evicted first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable
+
+import numpy as np
+
+CACHE_PATH = "vector_db/embedding_cache.sqlite3"
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0   # rows dropped from the disk tier
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different strings share one entry."""
+    return " ".join(text.split())
+
+
+def _cache_key(model: str, text: str) -> str:
+    return hashlib.sha1(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        path: str | None = CACHE_PATH,
+        max_memory_items: int = 4096,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._stats = CacheStats()
+
+    # ── Disk tier ────────────────────────────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection | None:
+        # Caller must hold _lock.
+        if self.path is None:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL,"
+                " nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _evict_disk(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        # Trim to 90% of the budget so we don't evict on every insert.
+        target = int(self.max_disk_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for key, nbytes in conn.execute(
+            "SELECT key, nbytes FROM embeddings ORDER BY last_used ASC"
+        ):
+            if total - freed <= target:
+                break
+            doomed.append((key,))
+            freed += nbytes
+        conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._stats.evictions += len(doomed)
+
+    # ── Memory tier ──────────────────────────────────────────────────────────
+
+    def _remember(self, key: str, vector: np.ndarray):
+        # Caller must hold _lock.
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def get_many(self, model: str, texts: list[str]) -> list[np.ndarray | None]:
+        """Look up each text; None marks a miss."""
+        keys = [_cache_key(model, t) for t in texts]
+        found: list[np.ndarray | None] = [None] * len(texts)
+        with self._lock:
+            pending: dict[str, list[int]] = {}
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats.memory_hits += 1
+                    found[i] = vector
+                else:
+                    pending.setdefault(key, []).append(i)
+
+            conn = self._db()
+            if pending and conn is not None:
+                placeholders = ",".join("?" * len(pending))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    list(pending),
+                ).fetchall()
+                now = time.time()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    for i in pending.pop(key):
+                        found[i] = vector
+                        self._stats.disk_hits += 1
+                if rows:
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows],
+                    )
+                    conn.commit()
+
+            self._stats.misses += sum(len(idx) for idx in pending.values())
+        return found
+
+    def put_many(self, model: str, texts: list[str], embeddings) -> None:
+        rows = []
+        now = time.time()
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                key = _cache_key(model, text)
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._remember(key, vector)
+                blob = vector.tobytes()
+                rows.append((key, model, blob, len(blob), now))
+
+            conn = self._db()
+            if rows and conn is not None:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, nbytes, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._evict_disk(conn)
+                conn.commit()
+
+    def embed(
+        self, model: str, texts: list[str], embed_fn: Callable[[list[str]], list]
+    ) -> list[np.ndarray]:
+        """
+        Return embeddings for texts, calling embed_fn once with only the
+        (deduplicated) cache misses.
+        """
+        found = self.get_many(model, texts)
+        missing = list(dict.fromkeys(
+            normalize_text(t) for t, v in zip(texts, found) if v is None
+        ))
+        if missing:
+            fresh = dict(zip(missing, embed_fn(missing)))
+            self.put_many(model, list(fresh), list(fresh.values()))
+            found = [
+                v if v is not None else np.asarray(fresh[normalize_text(t)], dtype=np.float32)
+                for t, v in zip(texts, found)
+            ]
+        return found
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return replace(self._stats)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM embeddings")
+                conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, creating it on first call."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
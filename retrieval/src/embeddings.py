@@ -0,0 +1,168 @@
+"""
+Embedding providers for retrieval.
+
+The provider is picked by settings.embedding_provider:
+  - "openai":  OpenAI embeddings API (default, text-embedding-3-small)
+  - "local":   sentence-transformers model on CPU — no network round trip
+  - "hashing": deterministic feature-hashing vectors — offline stand-in for tests
+
+Every provider takes a batch of texts and returns one float32 vector per text.
+embed_texts() is the single entry point used by the vector store and indexers;
+it routes cacheable providers through the two-tier embedding cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+
+from config import settings
+from retrieval.src.embedding_cache import get_embedding_cache
+
+DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "local": "all-MiniLM-L6-v2",
+    "hashing": "hashing-384",
+}
+
+
+class EmbeddingProvider(Protocol):
+    model_name: str
+    cacheable: bool   # worth persisting in the embedding cache
+
+    def __call__(self, texts: list[str]) -> list[np.ndarray]: ...
+
+
+class OpenAIEmbedder:
+    cacheable = True
+    max_batch = 2048  # API limit on inputs per request
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                self._client = OpenAI(api_key=settings.openai_api_key)
+            return self._client
+
+    def __call__(self, texts: list[str]) -> list[np.ndarray]:
+        client = self._get_client()
+        vectors: list[np.ndarray] = []
+        for start in range(0, len(texts), self.max_batch):
+            response = client.embeddings.create(
+                model=self.model_name, input=texts[start:start + self.max_batch]
+            )
+            vectors.extend(np.asarray(d.embedding, dtype=np.float32) for d in response.data)
+        return vectors
+
+
+@lru_cache(maxsize=None)
+def _load_sentence_transformer(model_name: str):
+    """Load a sentence-transformers model once per process (CPU)."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device="cpu")
+
+
+class SentenceTransformerEmbedder:
+    cacheable = True
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    def __call__(self, texts: list[str]) -> list[np.ndarray]:
+        model = _load_sentence_transformer(self.model_name)
+        matrix = model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return list(matrix.astype(np.float32, copy=False))
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing over lowercase word tokens and character trigrams.
+    Deterministic across processes and platforms, so tests and offline runs get
+    stable rankings without a model download or API key.
+    """
+
+    cacheable = False  # cheaper to recompute than to look up
+
+    def __init__(self, model_name: str = "hashing-384", dim: int | None = None):
+        self.model_name = model_name
+        match = re.search(r"(\d+)$", model_name)
+        self.dim = dim or (int(match.group(1)) if match else 384)
+
+    def _features(self, text: str) -> list[str]:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        grams = [w[i:i + 3] for w in words for i in range(max(1, len(w) - 2))]
+        return words + grams
+
+    def __call__(self, texts: list[str]) -> list[np.ndarray]:
+        vectors = []
+        for text in texts:
+            v = np.zeros(self.dim, dtype=np.float32)
+            for feature in self._features(text):
+                digest = hashlib.md5(feature.encode("utf-8")).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dim
+                v[index] += 1.0 if digest[4] & 1 else -1.0
+            norm = np.linalg.norm(v)
+            vectors.append(v / norm if norm else v)
+        return vectors
+
+
+_PROVIDERS = {
+    "openai": OpenAIEmbedder,
+    "local": SentenceTransformerEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+@lru_cache(maxsize=None)
+def get_embedder(provider: str | None = None, model_name: str | None = None) -> EmbeddingProvider:
+    """Return the shared embedder for a provider (defaults come from settings)."""
+    provider = (provider or settings.embedding_provider or "openai").lower()
+    if provider not in _PROVIDERS:
+        raise ValueError(
+            f"Unknown embedding provider: {provider!r}. "
+            f"Available: {sorted(_PROVIDERS)}"
+        )
+    if model_name is None and provider == (settings.embedding_provider or "openai").lower():
+        model_name = settings.embedding_model or None
+    return _PROVIDERS[provider](model_name or DEFAULT_MODELS[provider])
+
+
+def embed_texts(texts: list[str], embedder: EmbeddingProvider | None = None) -> list[np.ndarray]:
+    """Embed texts with the configured provider; only cache misses are computed."""
+    embedder = embedder or get_embedder()
+    if not texts:
+        return []
+    if not embedder.cacheable:
+        return embedder(list(texts))
+    return get_embedding_cache().embed(embedder.model_name, texts, embedder)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Vectors as a float32 [n, dim] matrix of L2-unit rows (zero rows stay zero)."""
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def warm_up() -> None:
+    """Load the configured model (and its weights) ahead of the first request."""
+    get_embedder()(["warm up"])   # bypasses the cache, so the model really runs
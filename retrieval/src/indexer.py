@@ -0,0 +1,227 @@
+"""
+Incremental, batched ingestion into the vector store.
+
+Each indexed chunk carries a content_hash in its metadata. A sync compares the
+desired chunks against the stored hashes and only embeds/upserts chunks that
+are new or changed, deletes ids that disappeared, and leaves the rest alone,
+so a catalog refresh costs proportional to the change rather than its size.
+
+For large catalogs (several universities, tens of thousands of chunks) ingest():
+  - streams records from the source JSON instead of loading it whole,
+  - groups changed chunks into token-bounded embedding batches,
+  - embeds batches concurrently on a bounded worker pool with retry/backoff,
+  - writes each finished batch to Chroma straight away.
+Because every written chunk is hashed, a crashed run resumes where it stopped:
+the next run sees those chunks as unchanged and skips them.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from retrieval.src import vector_store
+from retrieval.src.embeddings import embed_texts
+from schemas.retrieval import Chunk, content_hash
+
+MAX_BATCH_TOKENS = 100_000   # well under the OpenAI per-request token limit
+MAX_BATCH_ITEMS = 512        # inputs per embedding request
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+
+
+@dataclass
+class IndexDiff:
+    collection: str
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{self.collection}: +{len(self.added)} added, "
+            f"~{len(self.updated)} updated, -{len(self.removed)} removed, "
+            f"{self.unchanged} unchanged"
+        )
+
+
+# ── Diffing ───────────────────────────────────────────────────────────────────
+
+
+def _needs_write(chunk: Chunk, existing: dict[str, str], diff: IndexDiff) -> bool:
+    stored = existing.get(chunk.source)
+    if stored is None:
+        diff.added.append(chunk.source)
+        return True
+    if stored != content_hash(chunk):
+        diff.updated.append(chunk.source)
+        return True
+    diff.unchanged += 1
+    return False
+
+
+def _changed_chunks(
+    chunks: Iterable[Chunk], existing: dict[str, str], diff: IndexDiff, seen: set[str]
+) -> Iterator[Chunk]:
+    for chunk in chunks:
+        if chunk.source in seen:
+            continue  # first occurrence wins, same as the builders' dedup
+        seen.add(chunk.source)
+        if _needs_write(chunk, existing, diff):
+            yield chunk
+
+
+# ── Streaming + batching ──────────────────────────────────────────────────────
+
+
+def iter_records(json_path: str | Path, read_size: int = 1 << 16) -> Iterator[dict]:
+    """
+    Yield the objects of a top-level JSON array one at a time, reading the file
+    in fixed-size blocks so memory stays flat regardless of catalog size.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, encoding="utf-8") as f:
+        buf = f.read(read_size).lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{json_path}: expected a top-level JSON array")
+        buf = buf[1:]
+        eof = False
+        while True:
+            buf = buf.lstrip().lstrip(",").lstrip()
+            if buf.startswith("]"):
+                return
+            try:
+                obj, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(read_size)
+                eof = not more
+                buf += more
+                continue
+            yield obj
+            buf = buf[end:]
+            if not buf.strip() and not eof:
+                more = f.read(read_size)
+                eof = not more
+                buf += more
+
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, else the ~4 chars/token rule."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def token_batches(
+    chunks: Iterable[Chunk],
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+) -> Iterator[list[Chunk]]:
+    """Group chunks so each embedding request stays under both limits."""
+    batch: list[Chunk] = []
+    tokens = 0
+    for chunk in chunks:
+        n = estimate_tokens(chunk.text)
+        if batch and (tokens + n > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(chunk)
+        tokens += n
+    if batch:
+        yield batch
+
+
+def _embed_with_retry(texts: list[str], retries: int = MAX_RETRIES):
+    for attempt in range(retries + 1):
+        try:
+            return embed_texts(texts)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def _print_progress(collection_name: str, written: int, diff: IndexDiff):
+    print(
+        f"[ingest] {collection_name}: {written} written, "
+        f"{diff.unchanged} unchanged so far"
+    )
+
+
+# ── Entry points ──────────────────────────────────────────────────────────────
+
+
+def ingest(
+    chunks: Iterable[Chunk],
+    collection_name: str,
+    store_data: bool = True,
+    max_workers: int = MAX_WORKERS,
+    max_tokens: int = MAX_BATCH_TOKENS,
+    progress: Callable[[str, int, IndexDiff], None] | None = _print_progress,
+    delete_missing: bool = True,
+) -> IndexDiff:
+    """
+    Sync a (possibly streamed) chunk source into a collection.
+
+    Embedding runs on up to max_workers threads; at most 2 × max_workers
+    batches are in flight so a huge source never piles up in memory. Writes
+    happen on the calling thread in submission order.
+    """
+    existing = vector_store.get_content_hashes(collection_name)
+    diff = IndexDiff(collection=collection_name)
+    seen: set[str] = set()
+    written = 0
+    in_flight: deque[tuple[list[Chunk], Future]] = deque()
+
+    def drain_one():
+        nonlocal written
+        batch, future = in_flight.popleft()
+        vector_store.add_chunks(
+            batch, collection_name, store_data=store_data, embeddings=future.result()
+        )
+        written += len(batch)
+        if progress:
+            progress(collection_name, written, diff)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for batch in token_batches(
+                _changed_chunks(chunks, existing, diff, seen), max_tokens=max_tokens
+            ):
+                in_flight.append((batch, pool.submit(_embed_with_retry, [c.text for c in batch])))
+                if len(in_flight) >= 2 * max_workers:
+                    drain_one()
+            while in_flight:
+                drain_one()
+        except BaseException:
+            for _, future in in_flight:
+                future.cancel()
+            raise
+
+    if delete_missing:
+        diff.removed = sorted(set(existing) - seen)
+        vector_store.delete_ids(diff.removed, collection_name)
+    return diff
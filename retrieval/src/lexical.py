@@ -0,0 +1,102 @@
+"""
+In-process BM25 index over the course catalog.
+
+Embeddings are weak on exact tokens — course codes ("CS-305"), tools ("SQL")
+and acronyms ("A/B Testing"). This inverted index scores those exactly and
+answers in microseconds; search.py fuses its ranking with the vector ranking.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from retrieval.src.catalog import get_catalog
+from schemas.retrieval import record_to_text
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*[+#]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is of on or the to with "
+    "course courses department credits description skills prerequisites none".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase tokens. Compound tokens are kept whole with separators removed
+    ("CS-305" → "cs305", "A/B" → "ab") and their parts are emitted as well,
+    so both "CS305" and "CS 305" match.
+    """
+    tokens: list[str] = []
+    for raw in _TOKEN_RE.findall(text.lower()):
+        parts = re.split(r"[-/.]", raw)
+        joined = "".join(parts)
+        if joined not in _STOPWORDS:
+            tokens.append(joined)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in _STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, docs: dict[str, str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: list[str] = list(docs)
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._doc_len: list[int] = []
+        for idx, text in enumerate(docs.values()):
+            counts = Counter(tokenize(text))
+            self._doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings[term].append((idx, tf))
+        n = len(self.ids)
+        self._avg_len = (sum(self._doc_len) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self._postings.items()
+        }
+
+    def search(self, query: str, k: int = 10, allowed: set[str] | None = None) -> list[tuple[str, float]]:
+        """
+        Top-k (id, score) pairs, best first. Empty when no term matches.
+        allowed restricts scoring to those ids (filter pushdown).
+        """
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for idx, tf in postings:
+                if allowed is not None and self.ids[idx] not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[idx] / self._avg_len)
+                scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.ids[idx], score) for idx, score in best]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[str]], weights: list[float] | None = None, k: int = 60
+) -> list[tuple[str, float]]:
+    """Fuse several ranked id lists into one (id, score) list, best first."""
+    weights = weights or [1.0] * len(rankings)
+    fused: dict[str, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, id_ in enumerate(ranking):
+            fused[id_] += weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+@lru_cache(maxsize=1)
+def get_course_bm25() -> BM25Index:
+    """BM25 over record_to_text + skills_taught for every catalog course, built once."""
+    docs = {}
+    for r in get_catalog():
+        # Skills are already in record_to_text; repeating them boosts skill matches.
+        docs[r["course_id"]] = f"{record_to_text(r)} {' '.join(r.get('skills_taught', []))}"
+    return BM25Index(docs)
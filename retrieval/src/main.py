@@ -1,34 +1,44 @@
-import json
-from retrieval.src.vector_store import add_chunks
-from schemas.retrieval import Chunk, record_to_text, category_to_text, extract_degree_abbr
+"""
+Build / refresh the Chroma indexes from the processed catalog files.
+
+    python -m retrieval.src.main
 
-COURSES_PATH = "/Users/Local Documents/uniflow/retrieval/data/processed/courses.json"
-REQUIREMENTS_PATH = "/Users/Local Documents/uniflow/retrieval/data/processed/requirements.json"
+Rebuilds are incremental: only new or changed chunks are re-embedded, in
+token-bounded batches on a small worker pool (see retrieval/src/indexer.py).
+"""
+
+from retrieval.src.catalog import COURSES_PATH, REQUIREMENTS_PATH, course_metadata
+from retrieval.src.indexer import IndexDiff, ingest, iter_records
+from schemas.retrieval import Chunk, record_to_text, category_to_text, extract_degree_abbr
 
 
-def build_courses_index(json_path=COURSES_PATH):
-    records = json.load(open(json_path))
-    chunks = [
+def build_courses_index(json_path=COURSES_PATH) -> IndexDiff:
+    chunks = (
         Chunk(
             text=record_to_text(r),
             source=r["course_id"],
-            data=r
+            data=r,
+            metadata=course_metadata(r),
         )
-        for r in records
-    ]
-    add_chunks(chunks, "courses")
+        for r in iter_records(json_path)
+    )
+    # Course records are served from the in-memory catalog, so only ids, vectors
+    # and the scalar filter fields (code, department, credits, degrees) go into Chroma.
+    return ingest(chunks, "courses", store_data=False)
 
 
-def build_requirements_index(json_path=REQUIREMENTS_PATH):
+def build_requirements_index(json_path=REQUIREMENTS_PATH) -> IndexDiff:
     """
     Index one chunk per category per degree for focused, high-quality embeddings.
     Duplicate degree entries in the source JSON are deduplicated by (abbr, category).
     """
-    records = json.load(open(json_path))
-    chunks = []
+    return ingest(_requirement_chunks(json_path), "requirements")
+
+
+def _requirement_chunks(json_path):
     seen_ids: set[str] = set()
 
-    for r in records:
+    for r in iter_records(json_path):
         degree_name = r["degree_name"]
         abbr = extract_degree_abbr(degree_name)
         for cat in r.get("course_requirements", []):
@@ -36,7 +46,7 @@ def build_requirements_index(json_path=REQUIREMENTS_PATH):
             if chunk_id in seen_ids:
                 continue  # skip duplicate degree entries
             seen_ids.add(chunk_id)
-            chunks.append(Chunk(
+            yield Chunk(
                 text=category_to_text(degree_name, abbr, cat),
                 source=chunk_id,
                 data={
@@ -47,10 +57,9 @@ def build_requirements_index(json_path=REQUIREMENTS_PATH):
                     "courses": cat.get("courses", []),
                     "notes": cat.get("notes", ""),
                 },
-            ))
-
-    add_chunks(chunks, "requirements")
+            )
 
 
-build_courses_index()
-build_requirements_index()
+if __name__ == "__main__":
+    for diff in (build_courses_index(), build_requirements_index()):
+        print(diff.summary())
@@ -0,0 +1,355 @@
+"""
+Exact brute-force vector backend on NumPy.
+
+For catalogs of a few hundred to a few thousand courses an HNSW index behind
+a SQLite-backed client is pure overhead. NumpyCollection keeps one contiguous
+float32 matrix of L2-normalized embeddings (optionally memory-mapped) plus an
+id array, and answers top-k for a whole batch of queries with one matrix
+product and argpartition — exact results, sub-millisecond at this size.
+
+It implements the subset of chromadb's Collection API that vector_store uses
+(upsert / delete / get / query / count), so vector_store works unchanged on
+either backend. Distances are cosine distances (1 − cosine similarity).
+
+Quantized storage (dtype="float16" | "int8") keeps only a compact copy of the
+matrix resident — 2x / 4x smaller; int8 rows carry one float32 scale each —
+and scores queries against it. With rescore=N the top k·N candidates are then
+re-ranked exactly against the float32 rows, read from the memory-mapped file,
+so recall stays at float32 level while RAM holds only the compact form. An
+in-memory collection (no directory) has no file to map, so it drops the
+float32 rows altogether and cannot rescore.
+
+On disk, a collection is a directory:
+    <path>/numpy/<name>/embeddings.npy   float32 [n, dim] (always full precision)
+    <path>/numpy/<name>/records.json     {"ids": [...], "metadatas": [...], "documents": [...]}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from retrieval.src.embeddings import normalize_rows
+
+DTYPES = ("float32", "float16", "int8")
+SCORE_BLOCK_ROWS = 8192   # rows upcast at a time when scoring a quantized matrix
+
+_OPS = {
+    "$eq": lambda col, v: col == v,
+    "$ne": lambda col, v: col != v,
+    "$gt": lambda col, v: np.array([x is not None and x > v for x in col], dtype=bool),
+    "$gte": lambda col, v: np.array([x is not None and x >= v for x in col], dtype=bool),
+    "$lt": lambda col, v: np.array([x is not None and x < v for x in col], dtype=bool),
+    "$lte": lambda col, v: np.array([x is not None and x <= v for x in col], dtype=bool),
+    "$in": lambda col, v: np.array([x in v for x in col], dtype=bool),
+    "$nin": lambda col, v: np.array([x not in v for x in col], dtype=bool),
+}
+_SET_OPS = ("$in", "$nin")   # values are turned into a set once per clause
+
+
+def quantize(matrix: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Compact copy of a float32 matrix: (codes, per-row scales). Scales are only
+    used by int8, where row ≈ codes * scale with scale = max|row| / 127.
+    """
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return np.asarray(matrix, dtype=np.float16), None
+    if dtype == "int8":
+        scales = np.ones(len(matrix), dtype=np.float32)
+        if len(matrix):
+            scales = np.abs(matrix).max(axis=1).astype(np.float32) / 127.0
+            scales[scales == 0] = 1.0
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"Unknown vector dtype: {dtype!r}. Available: {list(DTYPES)}")
+
+
+class NumpyCollection:
+    def __init__(
+        self,
+        name: str,
+        directory: str | Path | None = None,
+        mmap: bool = False,
+        dtype: str = "float32",
+        rescore: int = 0,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype!r}. Available: {list(DTYPES)}")
+        if rescore and dtype != "float32" and directory is None:
+            raise ValueError("rescore needs a directory to memory-map the float32 rows from")
+        self.name = name
+        self.directory = Path(directory) if directory is not None else None
+        # Quantized collections only need the float32 rows for rescoring, so
+        # they are always memory-mapped when there is a file to map.
+        self.mmap = mmap or dtype != "float32"
+        self.dtype = dtype
+        self.rescore = rescore
+        self._lock = threading.Lock()
+        # float32 rows; None for an in-memory quantized collection (see _rows).
+        self._matrix: np.ndarray | None = np.zeros((0, 0), dtype=np.float32)
+        self._codes = self._matrix
+        self._scales: np.ndarray | None = None
+        self._ids = np.array([], dtype=object)
+        self._metadatas: list[dict | None] = []
+        self._documents: list[str | None] = []
+        self._row: dict[str, int] = {}
+        self._columns: dict[str, np.ndarray] = {}
+        if self.directory is not None and (self.directory / "records.json").exists():
+            self._load()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def _load(self):
+        with open(self.directory / "records.json") as f:
+            records = json.load(f)
+        self._set_matrix(np.load(
+            self.directory / "embeddings.npy", mmap_mode="r" if self.mmap else None
+        ))
+        self._set_records(records["ids"], records["metadatas"], records["documents"])
+
+    def _save(self):
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never see a half-written file.
+        tmp = self.directory / "embeddings.tmp.npy"
+        np.save(tmp, self._rows(slice(None)))
+        os.replace(tmp, self.directory / "embeddings.npy")
+        tmp = self.directory / "records.tmp.json"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "ids": self._ids.tolist(),
+                    "metadatas": self._metadatas,
+                    "documents": self._documents,
+                },
+                f,
+            )
+        os.replace(tmp, self.directory / "records.json")
+        if self.mmap:
+            # Drop the in-memory float32 copy; keep serving from the file.
+            self._set_matrix(np.load(self.directory / "embeddings.npy", mmap_mode="r"))
+
+    def _set_matrix(self, matrix: np.ndarray):
+        self._codes, self._scales = quantize(matrix, self.dtype)
+        in_memory_only = self.directory is None and self.dtype != "float32"
+        self._matrix = None if in_memory_only else matrix
+
+    def _rows(self, rows) -> np.ndarray:
+        """float32 rows, dequantized from the codes when no float32 copy is kept."""
+        if self._matrix is not None:
+            return np.ascontiguousarray(self._matrix[rows], dtype=np.float32)
+        values = self._codes[rows].astype(np.float32)
+        return values if self._scales is None else values * self._scales[rows][:, None]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes of vector data held in memory: the scored matrix, int8 scales and
+        any in-memory float32 copy. Memory-mapped float32 rows are only paged in
+        for rescoring and are not counted.
+        """
+        held = self._codes.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+        if self._matrix is not None and self._matrix is not self._codes and not isinstance(
+            self._matrix, np.memmap
+        ):
+            held += self._matrix.nbytes
+        return held
+
+    def _set_records(self, ids, metadatas, documents):
+        self._ids = np.array(ids, dtype=object)
+        self._metadatas = list(metadatas)
+        self._documents = list(documents)
+        self._row = {id_: i for i, id_ in enumerate(ids)}
+        self._columns = {}
+
+    # ── Metadata masks ───────────────────────────────────────────────────────
+
+    def _column(self, field: str) -> np.ndarray:
+        col = self._columns.get(field)
+        if col is None:
+            col = np.empty(len(self._metadatas), dtype=object)
+            col[:] = [(m or {}).get(field) for m in self._metadatas]
+            self._columns[field] = col
+        return col
+
+    def mask(self, where: dict | None = None, ids: list[str] | None = None) -> np.ndarray | None:
+        """
+        Boolean row mask for a Chroma-style where filter ($eq/$ne/$gt/$gte/
+        $lt/$lte/$in/$nin, $and/$or) and/or an id allow-list. None = all rows.
+        """
+        result = None
+        if where:
+            result = self._eval_where(where)
+        if ids is not None:
+            id_mask = np.zeros(len(self._ids), dtype=bool)
+            id_mask[[self._row[i] for i in ids if i in self._row]] = True
+            result = id_mask if result is None else result & id_mask
+        return result
+
+    def _eval_where(self, where: dict) -> np.ndarray:
+        masks = []
+        for key, cond in where.items():
+            if key == "$and":
+                masks.append(np.logical_and.reduce([self._eval_where(c) for c in cond]))
+            elif key == "$or":
+                masks.append(np.logical_or.reduce([self._eval_where(c) for c in cond]))
+            elif isinstance(cond, dict):
+                for op, value in cond.items():
+                    if op in _SET_OPS:
+                        value = set(value)
+                    masks.append(np.asarray(_OPS[op](self._column(key), value), dtype=bool))
+            else:
+                masks.append(np.asarray(self._column(key) == cond, dtype=bool))
+        return np.logical_and.reduce(masks) if masks else np.ones(len(self._ids), dtype=bool)
+
+    # ── Chroma-compatible API ────────────────────────────────────────────────
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        vectors = normalize_rows(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            matrix = self._rows(slice(None)).copy()   # writable in-memory copy
+            if matrix.size == 0:
+                matrix = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            all_ids = self._ids.tolist()
+            all_meta, all_docs = list(self._metadatas), list(self._documents)
+            rows = dict(self._row)
+            new_rows = []
+            for id_, vector, doc, meta in zip(ids, vectors, documents, metadatas):
+                row = rows.get(id_)
+                if row is None:
+                    rows[id_] = len(all_ids)
+                    new_rows.append(vector)
+                    all_ids.append(id_)
+                    all_meta.append(meta)
+                    all_docs.append(doc)
+                    continue
+                if row < len(matrix):
+                    matrix[row] = vector
+                else:
+                    new_rows[row - len(matrix)] = vector   # repeated id within this call
+                all_meta[row] = meta
+                all_docs[row] = doc
+            if new_rows:
+                matrix = np.vstack([matrix, np.stack(new_rows)])
+            self._set_matrix(np.ascontiguousarray(matrix))
+            self._set_records(all_ids, all_meta, all_docs)
+            self._save()
+
+    def delete(self, ids):
+        with self._lock:
+            doomed = {self._row[i] for i in ids if i in self._row}
+            if not doomed:
+                return
+            keep = [i for i in range(len(self._ids)) if i not in doomed]
+            self._set_matrix(self._rows(keep))
+            self._set_records(
+                [self._ids[i] for i in keep],
+                [self._metadatas[i] for i in keep],
+                [self._documents[i] for i in keep],
+            )
+            self._save()
+
+    def get(self, ids=None, where=None, include=("metadatas", "documents")):
+        with self._lock:
+            return self._get(ids, where, include)
+
+    def _get(self, ids, where, include):
+        # Caller must hold _lock.
+        rows = range(len(self._ids))
+        mask = self.mask(where, ids)
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+        result = {"ids": [self._ids[i] for i in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[i] for i in rows]
+        if "documents" in include:
+            result["documents"] = [self._documents[i] for i in rows]
+        if "embeddings" in include:
+            result["embeddings"] = self._rows(list(rows))
+        return result
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: dict | None = None,
+        ids: list[str] | None = None,
+        include=("metadatas", "documents", "distances"),
+    ):
+        queries = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        with self._lock:
+            return self._query(queries, n_results, where, ids, include)
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """[m, n] similarities against the resident (possibly quantized) matrix."""
+        if self.dtype == "float32":
+            return queries @ self._codes.T
+        scores = np.empty((len(queries), len(self._codes)), dtype=np.float32)
+        for start in range(0, len(self._codes), SCORE_BLOCK_ROWS):
+            block = self._codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    def _query(self, queries, n_results, where, ids, include):
+        # Caller must hold _lock.
+        row_ids = self._ids
+        out = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        if len(row_ids) == 0:
+            for _ in queries:
+                for key in out:
+                    out[key].append([])
+            return out
+
+        scores = self._scores(queries)               # [m, n] cosine similarity
+        mask = self.mask(where, ids)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+            n_results = min(n_results, int(mask.sum()))
+        k = min(n_results, scores.shape[1])
+
+        if self.rescore and self.dtype != "float32" and k > 0:
+            # Exact second pass: re-rank the top k·rescore candidates on float32 rows.
+            eligible = int(mask.sum()) if mask is not None else scores.shape[1]
+            candidates = _top_k(scores, min(k * self.rescore, eligible))
+            rows = self._rows(candidates.ravel())
+            exact = np.einsum("md,mcd->mc", queries, rows.reshape(*candidates.shape, -1))
+            order = _top_k(exact, min(k, exact.shape[1]))
+            top = np.take_along_axis(candidates, order, axis=1)
+            top_scores = np.take_along_axis(exact, order, axis=1)
+        else:
+            top = _top_k(scores, k)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+
+        for q, rows in enumerate(top):
+            out["ids"].append([row_ids[i] for i in rows])
+            out["distances"].append((1.0 - top_scores[q]).tolist())
+            out["metadatas"].append([self._metadatas[i] for i in rows])
+            out["documents"].append([self._documents[i] for i in rows])
+        return {key: value for key, value in out.items() if key == "ids" or key in include}
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k best scores per row, best first."""
+    if k <= 0:
+        return np.zeros((len(scores), 0), dtype=np.intp)
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+    # argpartition leaves the top-k unordered; sort just those k.
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
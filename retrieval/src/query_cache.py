@@ -0,0 +1,126 @@
+"""
+Result cache in front of vector-store queries.
+
+Students aiming for the same role send the same position query, so the same
+(collection, query, k, filter) lookup repeats many times. Each one costs an
+embedding lookup and an ANN pass. This cache keeps the finished hit lists:
+
+  - keyed by (collection, embedding model, backend, normalized text, k,
+    result shape, filter),
+  - entries expire after a TTL,
+  - bounded in size, least-recently-used entries are evicted first,
+  - every entry remembers the index version it was computed against; once
+    the index is rewritten (vector_store stamps a version file on every write)
+    the entry no longer matches and is dropped on its next lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Hashable
+
+from config import settings
+from retrieval.src.embedding_cache import normalize_text
+
+
+@dataclass
+class QueryCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0       # misses caused by the TTL
+    invalidated: int = 0   # misses caused by an index rebuild
+    evictions: int = 0     # entries dropped by the size bound
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def make_key(
+    collection: str,
+    text: str,
+    k: int,
+    shape: str,
+    where: dict | None = None,
+    model: str = "",
+    backend: str = "",
+) -> tuple:
+    """Cache key for one query text. shape tells apart result types (records / hits / ids)."""
+    filter_key = json.dumps(where, sort_keys=True) if where else ""
+    return (collection, model, backend, normalize_text(text), k, shape, filter_key)
+
+
+class QueryResultCache:
+    def __init__(
+        self,
+        max_items: int = 1024,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, Hashable, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = QueryCacheStats()
+
+    def get(self, key: tuple, version: Hashable) -> list | None:
+        """Cached results for key, or None when missing, expired or from an older index."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            stored_at, stored_version, results = entry
+            if stored_version != version:
+                del self._entries[key]
+                self._stats.invalidated += 1
+                self._stats.misses += 1
+                return None
+            if self._clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return list(results)
+
+    def put(self, key: tuple, version: Hashable, results: list) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), version, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> QueryCacheStats:
+        with self._lock:
+            return replace(self._stats)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: QueryResultCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryResultCache:
+    """Return the process-wide query result cache, creating it on first call."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryResultCache(
+                max_items=settings.query_cache_size, ttl=settings.query_cache_ttl
+            )
+        return _cache
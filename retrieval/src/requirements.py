@@ -0,0 +1,143 @@
+"""
+Compiled degree requirements — degree name / abbreviation / alias → Degree.
+
+requirements.json is parsed once per process into frozen Degree objects with
+per-category course-code sets, credit totals and a precomputed all_mandatory
+flag, so planning a student's courses is set arithmetic only. get_requirements()
+stats the file on each call and recompiles it when its mtime changes, so edits
+to the requirements go live without a restart.
+
+Lookups accept any of:
+    "BSCS - Bachelor of Science in Computer Science"   (dropdown value)
+    "BSCS"                                             (abbreviation)
+    "Bachelor of Science in Computer Science"          (name without abbreviation)
+case- and whitespace-insensitively.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from retrieval.src.catalog import REQUIREMENTS_PATH, normalize_course_code
+from schemas.retrieval import extract_degree_abbr
+
+
+@dataclass(frozen=True)
+class RequirementCourse:
+    course_id: str     # as written in requirements.json
+    code: str          # normalized, for comparisons
+    title: str
+    credits: float
+
+
+@dataclass(frozen=True)
+class Category:
+    name: str
+    credits_required: float
+    courses: tuple[RequirementCourse, ...]
+    codes: frozenset[str]
+    total_credits: float
+    all_mandatory: bool   # every listed course is needed to reach credits_required
+
+
+@dataclass(frozen=True)
+class Degree:
+    name: str
+    abbr: str
+    categories: tuple[Category, ...]
+    codes: frozenset[str]             # every course listed by any category
+    selection_codes: frozenset[str]   # courses in categories the student chooses from
+
+
+def _alias_key(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def _aliases(name: str, abbr: str) -> set[str]:
+    aliases = {name, abbr}
+    # "BSCS - Bachelor of …" and "Bachelor of … (BSCS)" both reduce to "Bachelor of …".
+    bare = re.sub(rf"^\s*{re.escape(abbr)}\s*[-–:]\s*|\s*\(\s*{re.escape(abbr)}\s*\)\s*$", "", name)
+    aliases.add(bare)
+    return {_alias_key(a) for a in aliases if a}
+
+
+def compile_degree(raw: dict) -> Degree:
+    categories = []
+    for cat in raw.get("course_requirements", []):
+        courses = tuple(
+            RequirementCourse(
+                course_id=c["code"],
+                code=normalize_course_code(c["code"]),
+                title=c.get("title", ""),
+                credits=float(c.get("credits", 3)),
+            )
+            for c in cat.get("courses", [])
+        )
+        credits_required = float(cat.get("credits_required", 0))
+        # Use actual credits (labs = 1 cr, regular = 3 cr)
+        total_credits = sum(c.credits for c in courses)
+        categories.append(Category(
+            name=cat.get("category", "General"),
+            credits_required=credits_required,
+            courses=courses,
+            codes=frozenset(c.code for c in courses),
+            total_credits=total_credits,
+            all_mandatory=credits_required >= total_credits,
+        ))
+    return Degree(
+        name=raw["degree_name"],
+        abbr=extract_degree_abbr(raw["degree_name"]),
+        categories=tuple(categories),
+        codes=frozenset().union(*(c.codes for c in categories)),
+        selection_codes=frozenset().union(
+            *(c.codes for c in categories if not c.all_mandatory)
+        ),
+    )
+
+
+class RequirementsIndex:
+    def __init__(self, degrees: list[dict]):
+        self.degrees = [compile_degree(d) for d in degrees]
+        self._by_alias: dict[str, Degree] = {}
+        for degree in self.degrees:
+            for alias in _aliases(degree.name, degree.abbr):
+                self._by_alias.setdefault(alias, degree)
+        membership: dict[str, set[str]] = {}
+        for degree in self.degrees:
+            for code in degree.codes:
+                membership.setdefault(code, set()).add(degree.abbr)
+        self.membership = {code: frozenset(abbrs) for code, abbrs in membership.items()}
+
+    def __len__(self) -> int:
+        return len(self.degrees)
+
+    def __iter__(self):
+        return iter(self.degrees)
+
+    def lookup(self, name: str) -> Degree | None:
+        """Degree by full name, abbreviation or name without the abbreviation."""
+        return self._by_alias.get(_alias_key(name))
+
+
+_lock = threading.Lock()
+_loaded: dict[str, tuple[int, RequirementsIndex]] = {}
+
+
+def get_requirements(path: str | Path = REQUIREMENTS_PATH) -> RequirementsIndex:
+    """Return the compiled index for a requirements.json, recompiling it if the file changed."""
+    path = str(path)
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path) as f:
+            index = RequirementsIndex(json.load(f))
+        _loaded[path] = (mtime, index)
+        print(f"[requirements] Compiled {len(index)} degrees from {path}")
+        return index
@@ -0,0 +1,162 @@
+"""
+Cross-encoder re-ranking of course candidates.
+
+Embedding order is a coarse relevance signal: query and course are encoded
+separately. A cross-encoder reads (query, course text) together and scores the
+pair, which ranks a short candidate list much better, at a higher cost per pair.
+So it only runs on the candidates search.py already fetched:
+
+  - pairs are scored in batches on CPU (sentence-transformers CrossEncoder),
+  - scores are cached per (normalized query, course_id), so repeated role
+    queries only score new candidates,
+  - batches are small, and a batch only starts if the measured cost per pair
+    says it fits in the latency budget; once the budget is spent (or a batch
+    finishes past it) the candidates keep their embedding order. Scores that
+    came in late are discarded for this call but still go into the cache.
+
+Enabled with settings.rerank_enabled; the shared reranker loads its model and
+measures its cost per pair when it is created (warm_up()), so neither
+happens inside a request's budget.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable
+
+from config import settings
+from retrieval.src.catalog import get_catalog
+from retrieval.src.embedding_cache import normalize_text
+from schemas.retrieval import QueryHit, record_to_text
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+@dataclass
+class RerankStats:
+    scored: int = 0        # pairs run through the model
+    cache_hits: int = 0    # pairs answered from the score cache
+    fallbacks: int = 0     # calls that ran out of budget and kept embedding order
+
+
+@lru_cache(maxsize=None)
+def _load_cross_encoder(model_name: str):
+    """Load a cross-encoder once per process (CPU)."""
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name, device="cpu")
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANK_MODEL,
+        budget_ms: float = 250.0,
+        batch_size: int = 4,
+        cache_size: int = 8192,
+        scorer: Callable[[list[tuple[str, str]]], list[float]] | None = None,
+    ):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._scorer = scorer
+        self._scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = RerankStats()
+        self._pair_seconds: float | None = None   # measured cost per pair, smoothed
+
+    def _score(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self._scorer is not None:
+            return list(self._scorer(pairs))
+        model = _load_cross_encoder(self.model_name)
+        scores = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return [float(s) for s in scores]
+
+    def _timed_score(self, pairs: list[tuple[str, str]]) -> list[float]:
+        start = time.perf_counter()
+        scores = self._score(pairs)
+        per_pair = (time.perf_counter() - start) / len(pairs)
+        with self._lock:
+            old = self._pair_seconds
+            self._pair_seconds = per_pair if old is None else 0.7 * old + 0.3 * per_pair
+        return scores
+
+    def warm_up(self) -> None:
+        """Load the model and measure its cost per pair ahead of the first request."""
+        self._score([("warm up", "warm up")])
+        self._timed_score([("warm up", "warm up")] * self.batch_size)
+
+    def _fallback(self, hits: list[QueryHit]) -> list[QueryHit]:
+        with self._lock:
+            self._stats.fallbacks += 1
+        return hits
+
+    def rerank(self, query: str, hits: list[QueryHit]) -> list[QueryHit]:
+        """
+        Reorder hits by cross-encoder score, best first. Falls back to the
+        given (embedding) order if the latency budget runs out.
+        """
+        if len(hits) < 2:
+            return hits
+        query_key = normalize_text(query)
+        scores: dict[str, float] = {}
+        with self._lock:
+            for hit in hits:
+                score = self._scores.get((query_key, hit.id))
+                if score is not None:
+                    self._scores.move_to_end((query_key, hit.id))
+                    scores[hit.id] = score
+            self._stats.cache_hits += len(scores)
+
+        catalog = get_catalog()
+        pending = []
+        for hit in hits:
+            if hit.id in scores:
+                continue
+            record = hit.data or catalog.get(hit.id)
+            if record is not None:
+                pending.append((hit.id, record_to_text(record)))
+
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            expected = (self._pair_seconds or 0.0) * len(batch)
+            if time.perf_counter() + expected > deadline:
+                return self._fallback(hits)
+            batch_scores = self._timed_score([(query, text) for _, text in batch])
+            with self._lock:
+                for (id_, _), score in zip(batch, batch_scores):
+                    scores[id_] = score
+                    self._scores[(query_key, id_)] = score
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+                self._stats.scored += len(batch)
+            if time.perf_counter() > deadline:
+                return self._fallback(hits)   # too late for this call; cached for the next
+
+        # Hits without a record keep their place after the scored ones.
+        return sorted(hits, key=lambda h: -scores.get(h.id, float("-inf")))
+
+    def stats(self) -> RerankStats:
+        with self._lock:
+            return replace(self._stats)
+
+
+@lru_cache(maxsize=1)
+def _shared_reranker() -> CrossEncoderReranker:
+    reranker = CrossEncoderReranker(
+        model_name=settings.rerank_model or DEFAULT_RERANK_MODEL,
+        budget_ms=settings.rerank_budget_ms,
+    )
+    reranker.warm_up()
+    return reranker
+
+
+def get_reranker() -> CrossEncoderReranker | None:
+    """The process-wide reranker, or None when re-ranking is disabled."""
+    return _shared_reranker() if settings.rerank_enabled else None
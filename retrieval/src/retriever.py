@@ -1,26 +1,35 @@
 """
-Retriever agent — LLM-driven course selection using retriever_prompt.md.
+Course selection for a student's remaining degree requirements.
 
-Tool design:
-  - get_all_courses: returns the COMPLETE list of courses the student still needs
-    (all required courses + electives to fill remaining credits), computed entirely
-    in Python using ChromaDB for ranking.  The LLM calls this once and outputs
-    the list verbatim — no enumeration or credit-counting left to the LLM.
+  - plan_courses / aplan_courses: the COMPLETE list of courses the student still
+    needs (all required courses + electives to fill remaining credits), computed
+    entirely in Python using the course index for ranking. This is the default
+    path (settings.course_planner = "direct").
+  - agent(): LLM-driven variant using retriever_prompt.md, kept as an opt-in
+    mode (settings.course_planner = "llm"). Its get_all_courses tool runs
+    plan_courses; the LLM calls it once and outputs the list verbatim.
 """
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass, field
+from typing import Callable
 
 from pydantic_ai import Agent, ModelRetry, RunContext
 
 from ai.prompts import load_prompt
 from config import settings
-from retrieval.src.vector_store import query as chroma_query
+from retrieval.src.catalog import get_catalog, normalize_course_code
+from retrieval.src.requirements import Degree, get_requirements
+from retrieval.src.search import CourseFilter, embed_queries, search_courses_many
+from retrieval.src.selection import Candidate, score_candidate, select_courses, select_covering
+from retrieval.src.skill_index import get_skill_index
+from retrieval.src.skill_ontology import get_skill_ontology
+from retrieval.src.vector_store import run_blocking
+from schemas.agent2 import CourseRecommendation
+from schemas.retrieval import QueryHit
 
 _SYSTEM_PROMPT = load_prompt("retrierver_prompt")
-_REQUIREMENTS_PATH = "retrieval/data/processed/requirements.json"
 
 _agent = None
 
@@ -56,7 +65,7 @@ def agent():
             return result
 
         @_agent.tool
-        def get_all_courses(ctx: RunContext[RetrieverDeps], enrolled_program: str) -> list[dict]:
+        async def get_all_courses(ctx: RunContext[RetrieverDeps], enrolled_program: str) -> list[dict]:
             """
             Returns the complete list of courses the student still needs for their degree.
             Includes ALL required courses (mandatory categories fully, selection categories
@@ -65,145 +74,213 @@ def agent():
             Call this EXACTLY ONCE. Use the returned list directly as your output —
             do not add, remove, or reorder any course.
             """
-            with open(_REQUIREMENTS_PATH) as f:
-                all_degrees = json.load(f)
-
-            # Always use the exact program name from deps (Streamlit dropdown value)
-            # instead of the LLM-provided argument, which may be reformatted.
-            query = ctx.deps.program_enrolled.strip()
-            print(f"[get_all_courses] Using program from deps: {query}")
-
-            # Exact match against degree_name in requirements.json
-            degree_data = next(
-                (d for d in all_degrees if d["degree_name"] == query),
-                None,
-            )
+            return [c.model_dump() for c in await aplan_courses(ctx.deps)]
 
-            if degree_data is None:
-                print(f"[get_all_courses] No degree match for: {query}")
-                return []
+    return _agent
 
-            completed = ctx.deps.completed_ids
-            position_query = (
-                " ".join(ctx.deps.skill_benchmark[:3])
-                if ctx.deps.skill_benchmark else enrolled_program
-            )
 
-            all_courses: list[dict] = []
-            picked_ids: set[str] = set(completed)
+# ── Direct planner ────────────────────────────────────────────────────────────
 
-            # ── 1. Required courses (mandatory + selection categories) ──────────
-            for cat in degree_data.get("course_requirements", []):
-                cat_name = cat.get("category", "General")
-                cat_courses = cat.get("courses", [])
-                credits_required = float(cat.get("credits_required", 0))
 
-                if not cat_courses:
-                    continue
+ELECTIVE_CANDIDATES = 30   # elective hits fetched for the knapsack to choose from
 
-                remaining = [c for c in cat_courses if c["code"] not in picked_ids]
-                # Use actual credits (labs = 1 cr, regular = 3 cr)
-                actual_cat_credits = sum(float(c.get("credits", 3)) for c in cat_courses)
-                all_mandatory = (credits_required >= actual_cat_credits)
-
-                if all_mandatory:
-                    # Include every remaining course in this category
-                    for c in remaining:
-                        all_courses.append({
-                            "course_id": c["code"],
-                            "title": c["title"],
-                            "category": cat_name,
-                            "credits": float(c.get("credits", 3)),
-                            "relevance_reason": f"Required for {cat_name}",
-                            "skills_covered": [],
-                            "schedule": "See course catalog for schedule",
-                        })
-                        picked_ids.add(c["code"])
-                else:
-                    # Pre-rank by ChromaDB relevance, pick until credits_required met
-                    catalog_results = chroma_query(position_query, "courses", k=50)
-                    ranked_ids = [r.get("course_id", "") for r in catalog_results]
-
-                    remaining_map = {c["code"]: c for c in remaining}
-                    ordered: list[dict] = []
-                    seen: set[str] = set()
-                    for rid in ranked_ids:
-                        if rid in remaining_map and rid not in seen:
-                            ordered.append(remaining_map[rid])
-                            seen.add(rid)
-                    for c in remaining:
-                        if c["code"] not in seen:
-                            ordered.append(c)
-
-                    completed_credits_in_cat = sum(
-                        float(c.get("credits", 3))
-                        for c in cat_courses if c["code"] in completed
-                    )
-                    filled = completed_credits_in_cat
-
-                    for c in ordered:
-                        if filled >= credits_required:
-                            break
-                        cr = float(c.get("credits", 3))
-                        all_courses.append({
-                            "course_id": c["code"],
-                            "title": c["title"],
-                            "category": cat_name,
-                            "credits": cr,
-                            "relevance_reason": f"Selected for {cat_name} (aligned with target role)",
-                            "skills_covered": [],
-                            "schedule": "See course catalog for schedule",
-                        })
-                        picked_ids.add(c["code"])
-                        filled += cr
-
-            # ── 2. Electives to fill remaining credit gap ───────────────────────
-            required_credits = sum(c["credits"] for c in all_courses)
-            elective_credits_needed = ctx.deps.credits_remaining - required_credits
-
-            print(
-                f"[get_all_courses] {len(all_courses)} required courses "
-                f"({required_credits} cr), elective gap: {elective_credits_needed} cr"
-            )
 
-            if elective_credits_needed > 0:
-                # Electives target skills the student is MISSING (benchmark − current)
-                student_lower = {s.lower() for s in ctx.deps.student_skills}
-                missing_skills = [
-                    s for s in ctx.deps.skill_benchmark
-                    if s.lower() not in student_lower
-                ]
-                elective_query = (
-                    " ".join(missing_skills) if missing_skills
-                    else position_query
+def student_queries(deps: RetrieverDeps) -> tuple[str, str, list[str]]:
+    """(position query, elective query, missing skills) for one student."""
+    position_query = (
+        " ".join(deps.skill_benchmark[:3])
+        if deps.skill_benchmark else deps.program_enrolled.strip()
+    )
+    # Electives target skills the student is MISSING (benchmark − current),
+    # compared by canonical skill so "ML" on a resume matches "Machine learning".
+    keys = get_skill_ontology().normalize_many(deps.skill_benchmark + deps.student_skills)
+    student_keys = set(keys[len(deps.skill_benchmark):])
+    missing_skills = [
+        s for s, key in zip(deps.skill_benchmark, keys)
+        if key not in student_keys
+    ]
+    elective_query = " ".join(missing_skills) if missing_skills else position_query
+    return position_query, elective_query, missing_skills
+
+
+def plan_courses(deps: RetrieverDeps) -> list[CourseRecommendation]:
+    """
+    The complete list of courses the student still needs: every required course
+    (mandatory categories fully, selection categories ranked by relevance to the
+    target role) plus electives targeting missing skills to fill the credit gap.
+    Deterministic — the same algorithm the retriever agent's tool runs, without
+    the LLM round trip.
+    """
+    # Always use the program name from deps (Streamlit dropdown value); the
+    # index also resolves abbreviations and names without the abbreviation.
+    degree = get_requirements().lookup(deps.program_enrolled.strip())
+    if degree is None:
+        return []
+
+    completed = {normalize_course_code(c) for c in deps.completed_ids}
+    position_query, elective_query = student_queries(deps)[:2]
+    # Both queries are embedded in one call; the elective search only needs
+    # the selection result for its filter, not for its query text.
+    vectors = embed_queries([position_query, elective_query])
+
+    # Rank only the courses that can fill a selection category — the
+    # filter is pushed into the index, so there is no over-fetch to trim.
+    # Hits are ids only; records come from the catalog.
+    selection_hits = search_courses_many(
+        [position_query],
+        course_filter=CourseFilter(
+            course_ids_in=degree.selection_codes, course_ids_not_in=completed
+        ),
+        rerank=True,
+        embeddings=None if vectors is None else vectors[:1],
+    )[0]
+
+    def rank_electives(picked_ids: set[str]) -> list[QueryHit]:
+        return search_courses_many(
+            [elective_query], k=ELECTIVE_CANDIDATES,
+            course_filter=CourseFilter(course_ids_not_in=picked_ids),
+            rerank=True,
+            embeddings=None if vectors is None else vectors[1:],
+        )[0]
+
+    return build_plan(deps, degree, selection_hits, rank_electives)
+
+
+def build_plan(
+    deps: RetrieverDeps,
+    degree: Degree,
+    selection_hits: list[QueryHit],
+    rank_electives: Callable[[set[str]], list[QueryHit]],
+) -> list[CourseRecommendation]:
+    """
+    The planning algorithm with ranking supplied by the caller: selection_hits
+    ranks the degree's selection courses for this student, and
+    rank_electives(excluded codes) returns ranked elective candidates.
+    """
+    completed = {normalize_course_code(c) for c in deps.completed_ids}
+    _, _, missing_skills = student_queries(deps)
+    # course code → bitset of the missing skills it teaches
+    cover = get_skill_index().coverage(missing_skills)
+    n_missing = len(missing_skills)
+    position_relevance = _relevance(selection_hits)
+
+    all_courses: list[CourseRecommendation] = []
+    picked_ids: set[str] = set(completed)
+
+    # ── 1. Required courses (mandatory + selection categories) ──────────────
+    for cat in degree.categories:
+        if not cat.courses:
+            continue
+
+        remaining = [c for c in cat.courses if c.code not in picked_ids]
+
+        if cat.all_mandatory:
+            # Include every remaining course in this category
+            for c in remaining:
+                all_courses.append(CourseRecommendation(
+                    course_id=c.course_id,
+                    title=c.title,
+                    category=cat.name,
+                    credits=c.credits,
+                    relevance_reason=f"Required for {cat.name}",
+                    skills_covered=_skills_covered(c.code, cover, missing_skills),
+                    schedule="See course catalog for schedule",
+                ))
+                picked_ids.add(c.code)
+        else:
+            # Pick the set that hits credits_required exactly with the best
+            # relevance + missing-skill coverage, listed in relevance order.
+            ordered = sorted(remaining, key=lambda c: -position_relevance.get(c.code, 0.0))
+            filled = sum(c.credits for c in cat.courses if c.code in completed)
+            candidates = [
+                Candidate(c.code, c.credits, _score(c.code, position_relevance, cover, n_missing))
+                for c in ordered
+            ]
+            chosen = {
+                c.code for c in select_courses(
+                    candidates, cat.credits_required - filled, planned=picked_ids
                 )
-                print(f"[get_all_courses] Elective query (missing skills): {elective_query}")
-                elective_results = chroma_query(elective_query, "courses", k=30)
-                elective_added = 0.0
-                for r in elective_results:
-                    if elective_added >= elective_credits_needed:
-                        break
-                    cid = r.get("course_id", "")
-                    if not cid or cid in picked_ids:
-                        continue
-                    cr = float(r.get("credits", 3))
-                    all_courses.append({
-                        "course_id": cid,
-                        "title": r.get("title", ""),
-                        "category": "Elective",
-                        "credits": cr,
-                        "relevance_reason": "Elective aligned with target role",
-                        "skills_covered": [],
-                        "schedule": "See course catalog for schedule",
-                    })
-                    picked_ids.add(cid)
-                    elective_added += cr
-
-            total_credits = sum(c["credits"] for c in all_courses)
-            print(
-                f"[get_all_courses] Total: {len(all_courses)} courses, "
-                f"{total_credits} cr (target: {ctx.deps.credits_remaining} cr)"
+            }
+            for c in ordered:
+                if c.code not in chosen:
+                    continue
+                all_courses.append(CourseRecommendation(
+                    course_id=c.course_id,
+                    title=c.title,
+                    category=cat.name,
+                    credits=c.credits,
+                    relevance_reason=f"Selected for {cat.name} (aligned with target role)",
+                    skills_covered=_skills_covered(c.code, cover, missing_skills),
+                    schedule="See course catalog for schedule",
+                ))
+                picked_ids.add(c.code)
+
+    # ── 2. Electives to fill remaining credit gap ───────────────────────────
+    # Candidates are the ranked hits plus every course the skill index says
+    # teaches a missing skill, so each missing skill gets a chance to be
+    # covered rather than only the one that dominates the query embedding.
+    elective_credits_needed = deps.credits_remaining - sum(c.credits for c in all_courses)
+    if elective_credits_needed > 0:
+        catalog = get_catalog()
+        elective_hits = rank_electives(picked_ids)
+        elective_relevance = _relevance(elective_hits)
+        elective_results = {
+            normalize_course_code(r["course_id"]): r
+            for r in catalog.join(elective_hits)
+            if normalize_course_code(r["course_id"]) not in picked_ids
+        }
+        for code in sorted(cover, key=lambda code: (-cover[code].bit_count(), code)):
+            record = catalog.get(code)
+            if record is not None and code not in picked_ids:
+                elective_results.setdefault(code, record)
+        candidates = [
+            Candidate(
+                code, float(r.get("credits", 3)),
+                _score(code, elective_relevance, cover, n_missing),
             )
-            return all_courses
+            for code, r in elective_results.items()
+        ]
+        chosen = select_covering(
+            candidates, cover, elective_credits_needed, planned=picked_ids
+        )
+        for candidate in chosen:
+            r = elective_results[candidate.code]
+            all_courses.append(CourseRecommendation(
+                course_id=r["course_id"],
+                title=r.get("title", ""),
+                category="Elective",
+                credits=candidate.credits,
+                relevance_reason="Elective aligned with target role",
+                skills_covered=_skills_covered(candidate.code, cover, missing_skills),
+                schedule="See course catalog for schedule",
+            ))
+            picked_ids.add(candidate.code)
 
-    return _agent
+    return all_courses
+
+
+def _relevance(hits: list[QueryHit]) -> dict[str, float]:
+    """Rank-based relevance by normalized code: 1.0 for the best hit, falling linearly."""
+    relevance: dict[str, float] = {}
+    for rank, hit in enumerate(hits):
+        relevance.setdefault(normalize_course_code(hit.id), 1.0 - rank / len(hits))
+    return relevance
+
+
+def _score(code: str, relevance: dict[str, float], cover: dict[str, int], n_missing: int) -> float:
+    coverage = cover.get(code, 0).bit_count() / n_missing if n_missing else 0.0
+    return score_candidate(relevance.get(code, 0.0), coverage)
+
+
+def _skills_covered(code: str, cover: dict[str, int], missing_skills: list[str]) -> list[str]:
+    """The missing skills a course teaches; otherwise the first skills it teaches."""
+    mask = cover.get(code, 0)
+    if mask:
+        return [s for i, s in enumerate(missing_skills) if mask >> i & 1]
+    record = get_catalog().get(code) or {}
+    return list(record.get("skills_taught", [])[:3])
+
+
+async def aplan_courses(deps: RetrieverDeps) -> list[CourseRecommendation]:
+    """plan_courses without blocking the event loop."""
+    return await run_blocking(plan_courses, deps)
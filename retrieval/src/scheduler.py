@@ -0,0 +1,199 @@
+"""
+Prerequisite-aware semester scheduling.
+
+courses.json lists prerequisites for every course. PrerequisiteGraph compiles
+them once per catalog: each course gets an index, and its direct and transitive
+prerequisites are stored as int bitsets over those indexes. Free-text entries
+("Senior standing", "Topic-dependent") are not courses and are ignored, except
+"Final semester of program", which pins a course to the last semester like a
+capstone.
+
+schedule_semesters() then lays out a student's remaining courses:
+  - a course is only placed after every planned prerequisite (prerequisites
+    already completed or outside the plan count as satisfied),
+  - among the courses that are ready, those that unlock the most other planned
+    courses go first, so long prerequisite chains start early,
+  - the plan gets as many semesters as keep each at or above min_credits, and
+    each semester takes its share of the remaining credits, so the load is
+    balanced instead of leaving a near-empty last semester,
+  - a lab is scheduled together with its lecture, as one unit with their
+    combined credits,
+  - the capstone and final-semester courses go last, after their prerequisites.
+Everything per call is bit arithmetic over a few dozen courses, so it is cheap
+enough to rerun on every edit in what-if mode.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+from retrieval.src.catalog import get_catalog, lab_lectures, normalize_course_code
+
+CAPSTONE_IDS = {
+    "BSBA": "BUS493", "BSCS": "CS494",
+    "MSCS": "CS595", "MSDS": "DS595", "MSEE": "EE595",
+}
+FINAL_SEMESTER_PREREQ = "final semester of program"
+
+
+class PrerequisiteGraph:
+    def __init__(self, records: list[dict]):
+        self.codes = [normalize_course_code(r["course_id"]) for r in records]
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.direct = [0] * len(records)
+        self.final_only = 0
+        for i, r in enumerate(records):
+            for prereq in r.get("prerequisites") or []:
+                j = self.index.get(normalize_course_code(prereq))
+                if j is not None and j != i:
+                    self.direct[i] |= 1 << j
+                elif prereq.strip().lower() == FINAL_SEMESTER_PREREQ:
+                    self.final_only |= 1 << i
+        self.closure = self._close()
+
+    def _close(self) -> list[int]:
+        # Iterative DFS with memoization; a cycle in the data is cut where found.
+        closure: list[int | None] = [None] * len(self.codes)
+        for root in range(len(self.codes)):
+            stack, on_path = [root], {root}
+            while stack:
+                i = stack[-1]
+                pending = [
+                    j for j in _bits(self.direct[i])
+                    if closure[j] is None and j not in on_path
+                ]
+                if pending:
+                    stack.append(pending[0])
+                    on_path.add(pending[0])
+                    continue
+                reach = self.direct[i]
+                for j in _bits(self.direct[i]):
+                    reach |= closure[j] or 0
+                closure[i] = reach & ~(1 << i)
+                stack.pop()
+                on_path.discard(i)
+        return closure
+
+    def prerequisites(self, code: str, transitive: bool = True) -> set[str]:
+        i = self.index.get(normalize_course_code(code))
+        if i is None:
+            return set()
+        return {self.codes[j] for j in _bits(self.closure[i] if transitive else self.direct[i])}
+
+    def is_final_only(self, code: str) -> bool:
+        i = self.index.get(normalize_course_code(code))
+        return i is not None and bool(self.final_only >> i & 1)
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _union(masks) -> int:
+    union = 0
+    for mask in masks:
+        union |= mask
+    return union
+
+
+@lru_cache(maxsize=None)
+def get_prerequisite_graph() -> PrerequisiteGraph:
+    """Prerequisite graph of the course catalog, built once per process."""
+    return PrerequisiteGraph(get_catalog().records)
+
+
+def schedule_semesters(
+    courses: list[dict],
+    min_credits: float,
+    capstone_id: str | None = None,
+    graph: PrerequisiteGraph | None = None,
+) -> list[list[dict]]:
+    """
+    Split course dicts (with course_id and credits) into semesters that respect
+    prerequisites, balance credits against min_credits and end with the capstone.
+    """
+    graph = graph or get_prerequisite_graph()
+    if not courses:
+        return []
+    capstone = normalize_course_code(capstone_id) if capstone_id else None
+    codes = [normalize_course_code(c["course_id"]) for c in courses]
+    credits = [float(c.get("credits", 3)) for c in courses]
+    n = len(courses)
+
+    # Re-express prerequisites over positions in this plan (bit p = courses[p]).
+    position = {code: p for p, code in enumerate(codes)}
+    needs, unlocks = [0] * n, [0] * n
+    for p, code in enumerate(codes):
+        i = graph.index.get(code)
+        if i is None:
+            continue
+        for j in _bits(graph.direct[i]):
+            q = position.get(graph.codes[j])
+            if q is not None and q != p:
+                needs[p] |= 1 << q
+        for j in _bits(graph.closure[i]):
+            q = position.get(graph.codes[j])
+            if q is not None and q != p:
+                unlocks[q] += 1
+
+    # A lab and its lecture are one unit (keyed by the lecture's position), so
+    # they always land in the same semester.
+    members: dict[int, list[int]] = {}
+    for p, code in enumerate(codes):
+        lectures = lab_lectures(code) or ()
+        owner = next((position[c] for c in lectures if c in position), p)
+        members.setdefault(owner, []).append(p)
+    for u, group in members.items():
+        group.sort(key=lambda p: p != u)   # lecture first
+    unit_mask = {u: sum(1 << p for p in group) for u, group in members.items()}
+    unit_needs = {
+        u: _union(needs[p] for p in group) & ~unit_mask[u] for u, group in members.items()
+    }
+    unit_credits = {u: sum(credits[p] for p in group) for u, group in members.items()}
+    unit_unlocks = {u: sum(unlocks[p] for p in group) for u, group in members.items()}
+
+    final = sorted(
+        u for u, group in members.items()
+        if any(codes[p] == capstone or graph.is_final_only(codes[p]) for p in group)
+    )
+    todo = sorted(u for u in members if u not in final)
+    # As many semesters as keep every one at or above min_credits.
+    n_semesters = max(1, math.floor(sum(credits) / min_credits))
+    credits_left = sum(credits)
+
+    semesters: list[list[int]] = []
+    done = 0
+    while todo:
+        semesters_left = n_semesters - len(semesters)
+        target = max(min_credits, credits_left / semesters_left) if semesters_left > 1 else math.inf
+        ready = [u for u in todo if unit_needs[u] & ~done == 0]
+        if not ready:
+            ready = todo[:1]   # prerequisite cycle within the plan: break it
+        ready.sort(key=lambda u: -unit_unlocks[u])   # stable: keeps plan order on ties
+        semester, load = [], 0.0
+        for u in ready:
+            if load >= target:
+                break
+            # Past min_credits, only take courses that keep the load within its share.
+            if load < min_credits or load + unit_credits[u] <= target:
+                semester.append(u)
+                load += unit_credits[u]
+        semesters.append(semester)
+        credits_left -= load
+        for u in semester:
+            done |= unit_mask[u]
+        todo = [u for u in todo if u not in semester]
+
+    if final:
+        last_mask = _union(unit_mask[u] for u in semesters[-1]) if semesters else 0
+        needs_final = _union(unit_needs[u] for u in final)
+        # Final courses may not share a semester with their own prerequisites.
+        if not semesters or needs_final & last_mask:
+            semesters.append([])
+        semesters[-1].extend(final)
+
+    return [[courses[p] for u in semester for p in members[u]] for semester in semesters]
@@ -0,0 +1,182 @@
+"""
+Course search — one entry point over the vector store and the BM25 index.
+
+Modes (settings.retrieval_mode):
+  - "vector":  embedding ANN search only (original behaviour)
+  - "lexical": BM25 only — exact codes / tools / acronyms, no embedding call
+  - "hybrid":  both, fused with reciprocal rank fusion
+
+All modes return id-only QueryHits ranked best first; join with get_catalog().
+With rerank=True and settings.rerank_enabled, each candidate list is then
+re-ordered by a cross-encoder (see rerank.py).
+A CourseFilter is pushed down into both the vector index (metadata where) and
+the BM25 scorer, so only eligible courses are ever ranked.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from config import settings
+from retrieval.src.catalog import get_catalog, get_degree_membership, normalize_course_code
+from retrieval.src.embeddings import embed_texts
+from retrieval.src.lexical import get_course_bm25, reciprocal_rank_fusion
+from retrieval.src.rerank import get_reranker
+from retrieval.src.vector_store import query_many, run_blocking
+from schemas.retrieval import QueryHit
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+# Exact lexical hits are precise, so the vector side needs far less over-fetch.
+DEFAULT_K = {"vector": 50, "lexical": 20, "hybrid": 20}
+
+
+@dataclass(frozen=True)
+class CourseFilter:
+    """Structured course filter; every field that is set must match."""
+
+    department: str | None = None
+    credits: float | None = None
+    course_ids_in: frozenset[str] | None = None     # allow-list of course codes
+    course_ids_not_in: frozenset[str] = frozenset()  # deny-list of course codes
+    degree: str | None = None                        # degree abbreviation, e.g. "BSCS"
+
+    def __post_init__(self):
+        # Accept any iterable of codes in any spelling; store normalized frozensets.
+        if self.course_ids_in is not None:
+            object.__setattr__(
+                self, "course_ids_in",
+                frozenset(normalize_course_code(c) for c in self.course_ids_in),
+            )
+        object.__setattr__(
+            self, "course_ids_not_in",
+            frozenset(normalize_course_code(c) for c in self.course_ids_not_in),
+        )
+
+    def to_where(self) -> dict | None:
+        """Chroma-style where clause over the indexed course metadata."""
+        clauses = []
+        if self.department is not None:
+            clauses.append({"department": self.department})
+        if self.credits is not None:
+            clauses.append({"credits": float(self.credits)})
+        if self.course_ids_in is not None:
+            clauses.append({"course_code": {"$in": sorted(self.course_ids_in)}})
+        if self.course_ids_not_in:
+            clauses.append({"course_code": {"$nin": sorted(self.course_ids_not_in)}})
+        if self.degree is not None:
+            clauses.append({f"deg_{self.degree}": True})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def matches(self, record: dict) -> bool:
+        code = normalize_course_code(record["course_id"])
+        if self.department is not None and record.get("department") != self.department:
+            return False
+        if self.credits is not None and float(record.get("credits", 3)) != float(self.credits):
+            return False
+        if self.course_ids_in is not None and code not in self.course_ids_in:
+            return False
+        if code in self.course_ids_not_in:
+            return False
+        if self.degree is not None and self.degree not in get_degree_membership().get(code, ()):
+            return False
+        return True
+
+    def allowed_ids(self) -> set[str]:
+        """Catalog course_ids passing the filter (for the in-process BM25 side)."""
+        return {r["course_id"] for r in get_catalog() if self.matches(r)}
+
+
+def _fused_hits(fused: list[tuple[str, float]], k: int) -> list[QueryHit]:
+    # Express fused scores as a distance in [0, 1] (0 = best) so callers can
+    # treat every mode alike.
+    top = fused[0][1] if fused else 1.0
+    return [QueryHit(id=id_, distance=1.0 - score / top) for id_, score in fused[:k]]
+
+
+def embed_queries(texts: list[str], mode: str | None = None) -> list | None:
+    """
+    Query vectors for texts in one embedding call, to share between several
+    filtered searches; None in lexical mode, which needs no embeddings.
+    """
+    if (mode or settings.retrieval_mode) == "lexical" or not texts:
+        return None
+    return embed_texts(list(texts))
+
+
+def search_courses_many(
+    texts: list[str],
+    k: int | None = None,
+    mode: str | None = None,
+    course_filter: CourseFilter | None = None,
+    rerank: bool = False,
+    embeddings: list | None = None,
+) -> list[list[QueryHit]]:
+    """
+    Rank catalog courses for each query text using the selected retrieval mode.
+    course_filter (shared by all texts) restricts results to eligible courses.
+    rerank re-orders each result list with the cross-encoder when it is enabled.
+    embeddings (one per text, e.g. from embed_queries) skips embedding the texts.
+    """
+    results = _search(texts, k, mode, course_filter, embeddings)
+    reranker = get_reranker() if rerank else None
+    if reranker is None:
+        return results
+    return [reranker.rerank(text, hits) for text, hits in zip(texts, results)]
+
+
+def _search(
+    texts: list[str],
+    k: int | None,
+    mode: str | None,
+    course_filter: CourseFilter | None,
+    embeddings: list | None = None,
+) -> list[list[QueryHit]]:
+    mode = mode or settings.retrieval_mode
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode!r}. Available: {RETRIEVAL_MODES}")
+    k = k or DEFAULT_K[mode]
+    if not texts:
+        return []
+    if course_filter is not None and course_filter.course_ids_in is not None:
+        if not course_filter.course_ids_in:
+            return [[] for _ in texts]
+        k = min(k, len(course_filter.course_ids_in))
+    where = course_filter.to_where() if course_filter else None
+
+    if mode == "vector":
+        return query_many(
+            texts, "courses", k=k, ids_only=True, where=where, embeddings=embeddings
+        )
+
+    bm25 = get_course_bm25()
+    allowed = course_filter.allowed_ids() if course_filter else None
+    lexical = [bm25.search(text, k, allowed=allowed) for text in texts]
+    if mode == "lexical":
+        return [_fused_hits(ranking, k) for ranking in lexical]
+
+    vector = query_many(
+        texts, "courses", k=k, ids_only=True, where=where, embeddings=embeddings
+    )
+    return [
+        _fused_hits(
+            reciprocal_rank_fusion([[h.id for h in v_hits], [id_ for id_, _ in l_hits]]),
+            k,
+        )
+        for v_hits, l_hits in zip(vector, lexical)
+    ]
+
+
+async def asearch_courses_many(
+    texts: list[str],
+    k: int | None = None,
+    mode: str | None = None,
+    course_filter: CourseFilter | None = None,
+    rerank: bool = False,
+) -> list[list[QueryHit]]:
+    """search_courses_many without blocking the event loop."""
+    return await run_blocking(
+        search_courses_many, texts, k=k, mode=mode, course_filter=course_filter, rerank=rerank
+    )
@@ -0,0 +1,217 @@
+"""
+Course-set selection for credit targets.
+
+A selection category ("pick 12 credits from these 8 courses") and the elective
+gap are both small 0/1 knapsacks: choose courses whose credits add up to the
+target while maximizing relevance to the target role plus coverage of the
+student's missing skills. Filling them greedily in ranking order overshoots
+whenever 1-credit labs and 3-credit courses mix.
+
+select_courses() solves it exactly with a dynamic program over credit totals
+(candidate sets are tens of courses, targets tens of credits). Objective, in
+order: reach the target, overshoot it as little as possible, then maximize the
+credit-weighted score. The DP checks a hard time budget and falls back to a
+greedy fill if it runs out. A lab is only ever picked together with its
+lecture (or when the lecture is already planned), so the target is never met
+with stray 1-credit labs. select_covering() first picks courses that cover the
+most still-missing skills per credit (see skill_index.py), then lets the
+knapsack fill the rest of the gap.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+from retrieval.src.catalog import lab_family, lab_lectures
+
+CREDIT_UNIT = 0.5          # credits are multiples of this (1-credit labs, 3/4-credit courses)
+SKILL_WEIGHT = 1.0         # weight of full missing-skill coverage relative to relevance 1.0
+DEFAULT_BUDGET_MS = 20.0
+
+
+@dataclass(frozen=True)
+class Candidate:
+    code: str
+    credits: float
+    score: float   # per-credit value: relevance + weighted missing-skill coverage
+
+
+def score_candidate(relevance: float, coverage: float) -> float:
+    return max(0.0, min(1.0, relevance)) + SKILL_WEIGHT * coverage
+
+
+def _units(credits: float) -> int:
+    return max(0, round(credits / CREDIT_UNIT))
+
+
+def _greedy(candidates: list[Candidate], target: float) -> list[Candidate]:
+    """Best score first, skipping courses that would overshoot; then the smallest overshoot."""
+    picked, filled = [], 0.0
+    rest = []
+    for c in sorted(candidates, key=lambda c: -c.score):
+        if filled + c.credits <= target:
+            picked.append(c)
+            filled += c.credits
+        else:
+            rest.append(c)
+    if filled < target and rest:
+        picked.append(min(rest, key=lambda c: (filled + c.credits - target, -c.score)))
+    return picked
+
+
+def _knapsack(
+    candidates: list[Candidate], target: float, deadline: float
+) -> list[Candidate] | None:
+    target_units = math.ceil(target / CREDIT_UNIT - 1e-9)
+    # Totals past target + the largest course can never be the smallest overshoot.
+    cap = target_units + max(_units(c.credits) for c in candidates)
+    # best[u] = (value, chosen-bitmask) of the best set totalling exactly u units.
+    best: list[tuple[float, int] | None] = [None] * (cap + 1)
+    best[0] = (0.0, 0)
+    for i, c in enumerate(candidates):
+        if time.perf_counter() > deadline:
+            return None
+        w = _units(c.credits)
+        value = c.score * c.credits
+        for u in range(cap, w - 1, -1):
+            prev = best[u - w]
+            if prev is None:
+                continue
+            option = (prev[0] + value, prev[1] | (1 << i))
+            if best[u] is None or option[0] > best[u][0]:
+                best[u] = option
+    reachable = [u for u in range(target_units, cap + 1) if best[u] is not None]
+    if not reachable:
+        # Not enough candidates to reach the target: take the largest total.
+        reachable = [max(u for u in range(cap + 1) if best[u] is not None)]
+    mask = best[reachable[0]][1]
+    return [c for i, c in enumerate(candidates) if mask >> i & 1]
+
+
+def bundle_labs(
+    candidates: list[Candidate], planned: set[str] | frozenset[str] = frozenset()
+) -> tuple[list[Candidate], dict[str, list[str]]]:
+    """
+    Candidates with each lab folded into its lecture, so the two are picked
+    together, plus unit code → member codes. A lab stays on its own only when
+    its lecture is already planned, and is dropped when neither is the case or
+    when the L / LG version of the same lab is planned or already taken.
+    """
+    lectures = {c.code: c for c in candidates if lab_lectures(c.code) is None}
+    families = {f for f in map(lab_family, planned) if f}
+    lab_of: dict[str, Candidate] = {}
+    alone: set[str] = set()
+    for c in candidates:
+        options = lab_lectures(c.code)
+        if options is None or lab_family(c.code) in families:
+            continue
+        lecture = next((o for o in options if o in lectures and o not in lab_of), None)
+        if lecture is not None:
+            lab_of[lecture] = c
+        elif any(o in planned for o in options):
+            alone.add(c.code)
+        else:
+            continue
+        families.add(lab_family(c.code))
+
+    units, members = [], {}
+    for c in candidates:
+        if c.code in alone:
+            units.append(c)
+            members[c.code] = [c.code]
+        elif c.code in lectures:
+            lab = lab_of.get(c.code)
+            if lab is None:
+                units.append(c)
+                members[c.code] = [c.code]
+                continue
+            credits = c.credits + lab.credits
+            score = (c.score * c.credits + lab.score * lab.credits) / credits
+            units.append(Candidate(c.code, credits, score))
+            members[c.code] = [c.code, lab.code]
+    return units, members
+
+
+def _union(masks) -> int:
+    union = 0
+    for mask in masks:
+        union |= mask
+    return union
+
+
+def _select(units: list[Candidate], target: float, time_budget_ms: float) -> list[Candidate]:
+    if target <= 0 or not units:
+        return []
+    if any(not math.isclose(c.credits / CREDIT_UNIT, _units(c.credits)) for c in units):
+        return _greedy(units, target)   # credits off the DP grid
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    chosen = _knapsack(units, target, deadline)
+    if chosen is None:
+        print(
+            f"[selection] Knapsack over {len(units)} courses hit the "
+            f"time budget; using greedy fill"
+        )
+        chosen = _greedy(units, target)
+    return chosen
+
+
+def select_courses(
+    candidates: list[Candidate],
+    target: float,
+    time_budget_ms: float = DEFAULT_BUDGET_MS,
+    planned: set[str] | frozenset[str] = frozenset(),
+) -> list[Candidate]:
+    """
+    Courses to take from candidates to reach target credits, in candidate order.
+    Labs come only with their lecture (see bundle_labs; planned holds the codes
+    already planned or completed). Exact DP within time_budget_ms, greedy fill
+    otherwise.
+    """
+    units, members = bundle_labs(candidates, planned)
+    keep = {code for c in _select(units, target, time_budget_ms) for code in members[c.code]}
+    return [c for c in candidates if c.code in keep]
+
+
+def select_covering(
+    candidates: list[Candidate],
+    cover: dict[str, int],
+    target: float,
+    time_budget_ms: float = DEFAULT_BUDGET_MS,
+    planned: set[str] | frozenset[str] = frozenset(),
+) -> list[Candidate]:
+    """
+    Courses to take from candidates to reach target credits, covering as many
+    missing skills as possible first. cover maps a course code to a bitset of
+    the missing skills it teaches. Greedy set cover (most new skills per credit,
+    then score) within the credit gap; the knapsack fills what is left. Labs
+    are bundled with their lectures as in select_courses().
+    """
+    if target <= 0 or not candidates:
+        return []
+    units, members = bundle_labs(candidates, planned)
+    unit_cover = {
+        code: _union(cover.get(m, 0) for m in codes) for code, codes in members.items()
+    }
+    picked: list[Candidate] = []
+    filled, covered = 0.0, 0
+    rest = list(units)
+    while True:
+        fitting = [
+            c for c in rest
+            if filled + c.credits <= target and unit_cover[c.code] & ~covered
+        ]
+        if not fitting:
+            break
+        best = max(
+            fitting,
+            key=lambda c: ((unit_cover[c.code] & ~covered).bit_count() / c.credits, c.score),
+        )
+        picked.append(best)
+        rest.remove(best)
+        filled += best.credits
+        covered |= unit_cover[best.code]
+    picked += _select(rest, target - filled, time_budget_ms)
+    keep = {code for c in picked for code in members[c.code]}
+    return [c for c in candidates if c.code in keep]
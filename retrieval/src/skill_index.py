@@ -0,0 +1,88 @@
+"""
+Skill → course inverted index over skills_taught in courses.json.
+
+Built once per catalog:
+  - every taught skill is reduced to its canonical key (skill_ontology.py:
+    case, hyphens and aliases such as "ML" → "machine learning") and numbered,
+  - courses_by_skill maps a canonical skill to the codes of the courses that
+    teach it,
+  - course_skills maps a course code to an int bitset over the skill numbers.
+
+coverage(missing_skills) answers "which courses teach which of these skills"
+as one bitset per course over the positions in missing_skills, which is what
+selection.select_covering() needs to cover as many missing skills as possible
+within a credit gap. Missing skills are normalized as one batch, so spellings
+the alias table does not know are mapped to their nearest canonical skill with
+a single embedding call. A missing skill matches a taught skill when one
+contains the other as whole words ("SQL" ↔ "Advanced SQL"), so "R" does not
+match every skill with an r in it.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from retrieval.src.catalog import get_catalog, normalize_course_code
+from retrieval.src.skill_ontology import SkillOntology, build_ontology, get_skill_ontology
+
+
+def _contains_words(a: str, b: str) -> bool:
+    return f" {a} " in f" {b} " or f" {b} " in f" {a} "
+
+
+class SkillIndex:
+    def __init__(self, records: list[dict], ontology: SkillOntology | None = None):
+        self.ontology = ontology or build_ontology(records)
+        self.skills: list[str] = []   # canonical keys; bit i = self.skills[i]
+        self.bit: dict[str, int] = {}
+        courses_by_skill: dict[str, set[str]] = {}
+        self.course_skills: dict[str, int] = {}
+        for r in records:
+            code = normalize_course_code(r["course_id"])
+            mask = 0
+            for skill in r.get("skills_taught") or []:
+                key = self.ontology.normalize(skill)
+                if not key:
+                    continue
+                if key not in self.bit:
+                    self.bit[key] = len(self.skills)
+                    self.skills.append(key)
+                mask |= 1 << self.bit[key]
+                courses_by_skill.setdefault(key, set()).add(code)
+            self.course_skills[code] = mask
+        self.courses_by_skill = {k: frozenset(v) for k, v in courses_by_skill.items()}
+        self._matches: dict[str, int] = {}
+
+    def matching(self, skill: str) -> int:
+        """Bitset of indexed skills that match one (student or benchmark) skill."""
+        return self._matching_key(self.ontology.normalize(skill))
+
+    def _matching_key(self, key: str) -> int:
+        mask = self._matches.get(key)
+        if mask is None:
+            mask = 0
+            if key:
+                for i, taught in enumerate(self.skills):
+                    if _contains_words(key, taught):
+                        mask |= 1 << i
+            self._matches[key] = mask
+        return mask
+
+    def coverage(self, missing_skills: list[str]) -> dict[str, int]:
+        """course code → bitset over positions in missing_skills, for courses covering any."""
+        cover: dict[str, int] = {}
+        keys = self.ontology.normalize_many(missing_skills)
+        for pos, key in enumerate(keys):
+            mask = self._matching_key(key)
+            while mask:
+                low = mask & -mask
+                for code in self.courses_by_skill[self.skills[low.bit_length() - 1]]:
+                    cover[code] = cover.get(code, 0) | 1 << pos
+                mask ^= low
+        return cover
+
+
+@lru_cache(maxsize=None)
+def get_skill_index() -> SkillIndex:
+    """Skill index of the course catalog, built once per process."""
+    return SkillIndex(get_catalog().records, get_skill_ontology())
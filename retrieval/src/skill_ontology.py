@@ -0,0 +1,233 @@
+"""
+Canonical skill names — "ML", "Machine learning" and "machine-learning" are one skill.
+
+Resume skills, PositionProfile.must_have and course skills_taught all spell
+skills differently. SkillOntology maps any spelling to a canonical key:
+
+  - canonical_skill() folds case, hyphens, underscores and slashes,
+  - an alias table maps abbreviations and synonyms to one key: the built-in
+    SYNONYMS groups plus "Long name (ABBR)" entries found in the catalog,
+  - embedding clusters merge catalog skills whose vectors are nearly the same
+    ("data visualisation" / "data visualization"); every member aliases to the
+    most-taught skill of its cluster.
+
+normalize() is one dict lookup. normalize_many() additionally embeds the
+unknown skills of a batch in one call and maps each to its nearest canonical
+skill when it is close enough; results are memoized, so a skill is embedded
+at most once per process. The nearest lookup only runs when the ontology was
+built with clusters for the configured embedding model.
+
+Build the clustered ontology offline (after changing courses.json or the
+embedding model):
+
+    python -m retrieval.src.skill_ontology
+
+Without a built file, get_skill_ontology() compiles the alias table alone from
+the catalog, which needs no embedding calls.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from retrieval.src.catalog import get_catalog
+from retrieval.src.embeddings import EmbeddingProvider, embed_texts, get_embedder, normalize_rows
+from retrieval.src.vector_store import VECTOR_DB_PATH
+
+SKILL_CLUSTER_THRESHOLD = 0.85   # cosine similarity to merge / map to a canonical skill
+
+# Synonym groups; the member taught most in the catalog becomes canonical
+# (the first member when none is taught).
+SYNONYMS = [
+    ("machine learning", "ml"),
+    ("artificial intelligence", "ai"),
+    ("deep learning", "dl"),
+    ("natural language processing", "nlp"),
+    ("computer vision", "cv"),
+    ("large language models", "llm", "llms"),
+    ("generative ai", "gen ai", "genai"),
+    ("object oriented programming", "oop"),
+    ("javascript", "js"),
+    ("typescript", "ts"),
+    ("kubernetes", "k8s"),
+    ("postgresql", "postgres"),
+    ("scikit learn", "sklearn"),
+    ("c++", "cpp"),
+    ("c#", "csharp"),
+    ("excel", "microsoft excel", "ms excel"),
+    ("power bi", "powerbi"),
+    ("business intelligence", "bi"),
+    ("statistics", "stats"),
+    ("data visualization", "data visualisation", "data viz"),
+    ("extract transform load", "etl"),
+    ("continuous integration", "ci cd"),
+    ("amazon web services", "aws"),
+    ("google cloud platform", "gcp"),
+    ("rest api", "rest apis", "restful api", "restful apis"),
+    ("user experience", "ux"),
+]
+
+
+def canonical_skill(skill: str) -> str:
+    return " ".join(re.sub(r"[-_/]", " ", skill.casefold()).split())
+
+
+def ontology_path(model_name: str, path: str = VECTOR_DB_PATH) -> Path:
+    return Path(path) / "skill_ontology" / f"{re.sub(r'[^a-zA-Z0-9._-]', '-', model_name)}.npz"
+
+
+class SkillOntology:
+    def __init__(
+        self,
+        aliases: dict[str, str],
+        canonical: list[str] | None = None,
+        vectors: np.ndarray | None = None,
+        model_name: str | None = None,
+        threshold: float = SKILL_CLUSTER_THRESHOLD,
+    ):
+        self.aliases = aliases               # spelling key → canonical key
+        self.canonical = canonical or []     # rows of vectors
+        self.vectors = vectors               # unit-normalized, or None (alias table only)
+        self.model_name = model_name
+        self.threshold = threshold
+        self._nearest: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, skill: str) -> str:
+        """Canonical key of a skill from the alias table (and earlier nearest lookups)."""
+        key = canonical_skill(skill)
+        return self.aliases.get(key) or self._nearest.get(key) or key
+
+    def normalize_many(
+        self, skills: list[str], embedder: EmbeddingProvider | None = None
+    ) -> list[str]:
+        """normalize() for a batch; unknown skills go to their nearest canonical skill."""
+        if self.vectors is not None and len(self.canonical):
+            unknown = list(dict.fromkeys(
+                key for key in map(canonical_skill, skills)
+                if key and key not in self.aliases and key not in self._nearest
+            ))
+            embedder = embedder or get_embedder()
+            if unknown and embedder.model_name == self.model_name:
+                similarity = normalize_rows(embed_texts(unknown, embedder)) @ self.vectors.T
+                best = similarity.argmax(axis=1)
+                with self._lock:
+                    for key, j, row in zip(unknown, best, similarity):
+                        self._nearest[key] = (
+                            self.canonical[j] if row[j] >= self.threshold else key
+                        )
+        return [self.normalize(s) for s in skills]
+
+    def save(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "model_name": self.model_name,
+            "threshold": self.threshold,
+            "aliases": self.aliases,
+            "canonical": self.canonical,
+        }
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                vectors=self.vectors if self.vectors is not None else np.zeros((0, 0), np.float32),
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> SkillOntology:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            vectors = data["vectors"]
+        return cls(
+            aliases=meta["aliases"],
+            canonical=meta["canonical"],
+            vectors=vectors if vectors.size else None,
+            model_name=meta["model_name"],
+            threshold=meta["threshold"],
+        )
+
+
+def build_ontology(
+    records: list[dict],
+    embedder: EmbeddingProvider | None = None,
+    threshold: float = SKILL_CLUSTER_THRESHOLD,
+) -> SkillOntology:
+    """
+    Alias table from the catalog's skills_taught and SYNONYMS; with an
+    embedder, also cluster the catalog skills by embedding similarity.
+    """
+    counts: Counter[str] = Counter()
+    aliases: dict[str, str] = {}
+    for r in records:
+        for skill in r.get("skills_taught") or []:
+            key = canonical_skill(skill)
+            # "Natural language processing (NLP)": both halves name the skill.
+            match = re.fullmatch(r"(.+?)\s*\(([^)]+)\)", key)
+            if match:
+                aliases[key] = aliases[match.group(2).strip()] = match.group(1)
+                key = match.group(1)
+            if key:
+                counts[key] += 1
+    for group in SYNONYMS:
+        target = max(group, key=lambda s: (counts[s], -group.index(s)))
+        for spelling in group:
+            aliases[spelling] = target
+    for key in counts:
+        aliases.setdefault(key, key)
+
+    if embedder is None:
+        return SkillOntology(aliases, threshold=threshold)
+
+    # Greedy clustering, most-taught skills first: each unassigned skill
+    # becomes a canonical skill and absorbs every unassigned skill close to it.
+    keys = sorted({aliases[k] for k in counts}, key=lambda k: (-counts[k], k))
+    vectors = normalize_rows(embed_texts(keys, embedder))
+    similarity = vectors @ vectors.T
+    owner = np.full(len(keys), -1)
+    for i in range(len(keys)):
+        if owner[i] < 0:
+            owner[(owner < 0) & (similarity[i] >= threshold)] = i
+            owner[i] = i
+    merged = {keys[i]: keys[owner[i]] for i in range(len(keys))}
+    aliases = {spelling: merged.get(key, key) for spelling, key in aliases.items()}
+    roots = np.flatnonzero(owner == np.arange(len(keys)))
+    return SkillOntology(
+        aliases,
+        canonical=[keys[i] for i in roots],
+        vectors=vectors[roots],
+        model_name=embedder.model_name,
+        threshold=threshold,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_skill_ontology() -> SkillOntology:
+    """The built ontology for the configured embedding model, or the catalog's alias table."""
+    path = ontology_path(get_embedder().model_name)
+    if path.exists():
+        return SkillOntology.load(path)
+    return build_ontology(get_catalog().records)
+
+
+def main():
+    embedder = get_embedder()
+    ontology = build_ontology(get_catalog().records, embedder)
+    path = ontology_path(embedder.model_name)
+    ontology.save(path)
+    get_skill_ontology.cache_clear()
+    print(
+        f"[skill_ontology] {len(ontology.aliases)} spellings → "
+        f"{len(ontology.canonical)} canonical skills, saved to {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
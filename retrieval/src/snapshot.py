@@ -0,0 +1,207 @@
+"""
+Portable single-file snapshots of a vector-store collection.
+
+A fresh worker otherwise has to copy vector_db/ wholesale or rebuild it, which
+re-embeds every chunk through the API. A snapshot holds everything needed to
+serve retrieval in one file:
+
+    magic      8 bytes  b"UFSNAP01"
+    length     8 bytes  little-endian size of the JSON header
+    header     JSON     format, collection, model, dim, count, ids,
+                        metadatas (content_hash, filter fields, stored records),
+                        documents, data_offset
+    padding    up to a 64-byte boundary
+    matrix     float16 [count, dim], row i belongs to ids[i]
+
+The matrix is memory-mapped on load, so opening a snapshot costs only the
+header parse. Importing writes into whatever backend settings.vector_backend
+selects; ids whose content_hash already matches are skipped.
+
+Usage:
+    python -m retrieval.src.snapshot export courses snapshots/courses.snap
+    python -m retrieval.src.snapshot import snapshots/courses.snap
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from retrieval.src import vector_store
+from retrieval.src.embeddings import get_embedder
+
+MAGIC = b"UFSNAP01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+@dataclass
+class Snapshot:
+    collection: str
+    model: str
+    ids: list[str]
+    metadatas: list[dict | None]
+    documents: list[str | None]
+    embeddings: np.ndarray   # float16 [count, dim], memory-mapped when loaded from disk
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def content_hashes(self) -> dict[str, str]:
+        return {
+            id_: (meta or {}).get("content_hash", "")
+            for id_, meta in zip(self.ids, self.metadatas)
+        }
+
+
+def _dense(embeddings, count: int) -> np.ndarray:
+    matrix = np.asarray(embeddings if embeddings is not None else [], dtype=np.float32)
+    return matrix.reshape(count, -1) if count else np.zeros((0, 0), dtype=np.float32)
+
+
+def read_collection(collection_name: str) -> Snapshot:
+    """Snapshot the current contents of a collection (embedding model from settings)."""
+    results = vector_store.get_collection(collection_name).get(
+        include=["metadatas", "documents", "embeddings"]
+    )
+    ids = list(results["ids"])
+    return Snapshot(
+        collection=collection_name,
+        model=get_embedder().model_name,
+        ids=ids,
+        metadatas=list(results["metadatas"]),
+        documents=list(results["documents"]),
+        embeddings=_dense(results.get("embeddings"), len(ids)).astype(np.float16),
+    )
+
+
+def write_snapshot(snapshot: Snapshot, path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    matrix = np.ascontiguousarray(snapshot.embeddings, dtype=np.float16)
+    header = {
+        "format": FORMAT_VERSION,
+        "collection": snapshot.collection,
+        "model": snapshot.model,
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "count": len(snapshot.ids),
+        "ids": snapshot.ids,
+        "metadatas": snapshot.metadatas,
+        "documents": snapshot.documents,
+        "data_offset": 0,
+    }
+    # The offset is part of the header, so size the header with a fixed-width
+    # placeholder first, then fill in the real value.
+    header["data_offset"] = 10 ** 15
+    prefix = len(MAGIC) + 8 + len(json.dumps(header).encode("utf-8"))
+    header["data_offset"] = -(-prefix // ALIGNMENT) * ALIGNMENT
+    raw = json.dumps(header).encode("utf-8").ljust(prefix - len(MAGIC) - 8)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(raw)))
+        f.write(raw)
+        f.write(b"\0" * (header["data_offset"] - f.tell()))
+        f.write(matrix.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def load_snapshot(path: str | Path) -> Snapshot:
+    """Open a snapshot file; the embedding matrix is memory-mapped, not read."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a snapshot file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    if header["format"] != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported snapshot format {header['format']}")
+    count, dim = header["count"], header["dim"]
+    if count and dim:
+        embeddings = np.memmap(
+            path, dtype=np.float16, mode="r", offset=header["data_offset"], shape=(count, dim)
+        )
+    else:
+        embeddings = np.zeros((count, dim), dtype=np.float16)
+    return Snapshot(
+        collection=header["collection"],
+        model=header["model"],
+        ids=header["ids"],
+        metadatas=header["metadatas"],
+        documents=header["documents"],
+        embeddings=embeddings,
+    )
+
+
+# ── Entry points ──────────────────────────────────────────────────────────────
+
+
+def export_collection(collection_name: str, path: str | Path) -> Snapshot:
+    snapshot = read_collection(collection_name)
+    write_snapshot(snapshot, path)
+    print(f"[snapshot] {collection_name}: exported {len(snapshot)} vectors to {path}")
+    return snapshot
+
+
+def import_snapshot(path: str | Path, collection_name: str | None = None) -> int:
+    """
+    Load a snapshot into the configured backend and make the collection match
+    it exactly. Returns the number of records written.
+    """
+    snapshot = load_snapshot(path)
+    collection_name = collection_name or snapshot.collection
+    model = get_embedder().model_name
+    if snapshot.model != model:
+        raise ValueError(
+            f"{path}: snapshot was embedded with {snapshot.model!r}, "
+            f"but the configured embedding model is {model!r}"
+        )
+
+    existing = vector_store.get_content_hashes(collection_name)
+    rows = [
+        i for i, (id_, meta) in enumerate(zip(snapshot.ids, snapshot.metadatas))
+        if existing.get(id_) != (meta or {}).get("content_hash", "")
+        or not (meta or {}).get("content_hash")
+    ]
+    vector_store.upsert_records(
+        collection_name,
+        ids=[snapshot.ids[i] for i in rows],
+        embeddings=np.asarray(snapshot.embeddings[rows], dtype=np.float32),
+        documents=[snapshot.documents[i] for i in rows],
+        metadatas=[snapshot.metadatas[i] for i in rows],
+    )
+    vector_store.delete_ids(sorted(set(existing) - set(snapshot.ids)), collection_name)
+    print(
+        f"[snapshot] {collection_name}: {len(rows)} written, "
+        f"{len(snapshot) - len(rows)} already current"
+    )
+    return len(rows)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Export / import vector-store snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write a collection to a snapshot file")
+    export.add_argument("collection")
+    export.add_argument("path")
+    load = commands.add_parser("import", help="load a snapshot into the configured backend")
+    load.add_argument("path")
+    load.add_argument("--collection", help="target collection (default: the snapshot's)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_collection(args.collection, args.path)
+    else:
+        import_snapshot(args.path, args.collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,411 @@
-import chromadb, os
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+import asyncio
+import chromadb
+import functools
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from dotenv import load_dotenv
 import json
-from schemas.retrieval import Chunk
+from pathlib import Path
+from config import settings
+from retrieval.src.catalog import get_catalog
+from retrieval.src.embeddings import DEFAULT_MODELS, embed_texts, get_embedder
+from retrieval.src.numpy_backend import NumpyCollection
+from retrieval.src.query_cache import QueryCacheStats, get_query_cache, make_key
+from schemas.retrieval import Chunk, QueryHit, content_hash
 
 load_dotenv()
 
-def get_collection(name: str):
-    embedding_fn = OpenAIEmbeddingFunction(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        model_name="text-embedding-3-small"
+VECTOR_DB_PATH = "vector_db"
+WRITE_BATCH_SIZE = 1000   # records per Chroma upsert (well under its max batch size)
+ASYNC_WORKERS = 4         # threads serving the async API (embedding + ANN calls block)
+
+
+@dataclass
+class PoolStats:
+    opens: int = 0    # PersistentClient instances created
+    hits: int = 0     # get_collection served from the pool
+    misses: int = 0   # get_collection had to open the collection
+
+
+# Process-wide handle pool — one client per path, one collection handle per
+# (path, collection, embedding model, backend). Opening a PersistentClient loads
+# SQLite and the HNSW segments, so we only pay that once per process.
+_lock = threading.Lock()
+_clients: dict[str, chromadb.ClientAPI] = {}
+_collections: dict[tuple[str, str, str, str], chromadb.Collection | NumpyCollection] = {}
+_stats = PoolStats()
+
+
+def _get_client(path: str) -> chromadb.ClientAPI:
+    # Caller must hold _lock.
+    client = _clients.get(path)
+    if client is None:
+        client = chromadb.PersistentClient(path=path)
+        _clients[path] = client
+        _stats.opens += 1
+    return client
+
+
+def _physical_name(name: str, model_name: str) -> str:
+    """
+    Vectors from different models have different dimensions, so each model gets
+    its own Chroma collection. The original OpenAI model keeps the bare name so
+    existing vector_db/ directories stay valid.
+    """
+    if model_name == DEFAULT_MODELS["openai"]:
+        return name
+    return f"{name}-{re.sub(r'[^a-zA-Z0-9._-]', '-', model_name)}"
+
+
+def get_collection(
+    name: str,
+    path: str = VECTOR_DB_PATH,
+    model_name: str | None = None,
+    backend: str | None = None,
+):
+    """
+    Return a pooled collection handle, opening the client/collection lazily.
+    backend defaults to settings.vector_backend: 'chroma' or 'numpy' (an exact
+    brute-force NumpyCollection with the same query/upsert/get/delete API,
+    optionally quantized per settings.vector_dtype).
+    """
+    model_name = model_name or get_embedder().model_name
+    backend = backend or settings.vector_backend
+    key = (path, name, model_name, backend)
+    with _lock:
+        collection = _collections.get(key)
+        if collection is not None:
+            _stats.hits += 1
+            return collection
+
+        _stats.misses += 1
+        physical_name = _physical_name(name, model_name)
+        if backend == "numpy":
+            collection = NumpyCollection(
+                physical_name,
+                directory=Path(path) / "numpy" / physical_name,
+                mmap=settings.vector_mmap,
+                dtype=settings.vector_dtype,
+                rescore=settings.vector_rescore,
+            )
+        elif backend == "chroma":
+            # Embeddings are always computed by retrieval.src.embeddings and passed
+            # explicitly, so the collection carries no embedding function.
+            collection = _get_client(path).get_or_create_collection(
+                name=physical_name,
+                embedding_function=None)
+        else:
+            raise ValueError(f"Unknown vector backend: {backend!r}. Available: ['chroma', 'numpy']")
+        _collections[key] = collection
+        return collection
+
+
+def refresh_collection(name: str, path: str = VECTOR_DB_PATH):
+    """Drop pooled handles for one collection so the next call re-opens it (e.g. after a rebuild)."""
+    with _lock:
+        for key in [k for k in _collections if k[0] == path and k[1] == name]:
+            del _collections[key]
+
+
+def close_collections():
+    """Release every pooled handle and stop the underlying Chroma clients."""
+    with _lock:
+        _collections.clear()
+        clients = list(_clients.values())
+        _clients.clear()
+        if clients:
+            clients[0].clear_system_cache()
+
+
+def pool_stats() -> PoolStats:
+    """Snapshot of the pool counters."""
+    with _lock:
+        return replace(_stats)
+
+
+# ── Index versions ────────────────────────────────────────────────────────────
+# Every write to a collection replaces a small stamp file under the vector_db
+# directory. Its (inode, mtime) pair is the collection's version, so a rebuild
+# run from another process (python -m retrieval.src.main) also invalidates
+# query results cached by a running app.
+
+
+def _version_path(collection_name: str) -> Path:
+    return Path(VECTOR_DB_PATH) / "index_versions" / collection_name
+
+
+def index_version(collection_name: str) -> tuple[int, int]:
+    """Current version stamp of a collection; (0, 0) if it was never written."""
+    try:
+        st = os.stat(_version_path(collection_name))
+    except FileNotFoundError:
+        return (0, 0)
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def _bump_index_version(collection_name: str):
+    path = _version_path(collection_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(str(time.time_ns()))
+    os.replace(tmp, path)
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+
+def add_chunks(
+    chunks: list[Chunk],
+    collection_name: str,
+    store_data: bool = True,
+    embeddings: list | None = None,
+):
+    """
+    Upsert chunks. Every chunk is stamped with its content_hash so incremental
+    rebuilds can skip it next time. With store_data=False the full record is
+    not written — use it for collections whose records live in the course catalog.
+    Pass embeddings to skip embedding here (e.g. computed by the ingest workers).
+    """
+    if not chunks:
+        return
+    documents = [c.text for c in chunks]
+    if embeddings is None:
+        embeddings = embed_texts(documents)          # cached, so unchanged text is free
+    metadatas = []
+    for c in chunks:
+        meta = {**c.metadata, "content_hash": content_hash(c)}
+        if store_data:
+            meta["data"] = json.dumps(c.data)        # full JSON preserved here
+        metadatas.append(meta)
+    upsert_records(
+        collection_name,
+        ids=[c.source for c in chunks],
+        embeddings=embeddings,
+        documents=documents,
+        metadatas=metadatas,
     )
-    client = chromadb.PersistentClient(path="vector_db")
-    return client.get_or_create_collection(
-        name=name,
-        embedding_function=embedding_fn)
 
 
-def add_chunks(chunks: list[Chunk], collection_name: str):
+def upsert_records(
+    collection_name: str,
+    ids: list[str],
+    embeddings,
+    documents: list[str | None],
+    metadatas: list[dict | None],
+):
+    """Write precomputed records as-is (e.g. from a snapshot), in Chroma-sized batches."""
+    if not ids:
+        return
     collection = get_collection(collection_name)
-    collection.upsert(
-        ids=[c.source for c in chunks],
-        documents=[c.text for c in chunks],         # used for embedding & search
-        metadatas=[{"data": json.dumps(c.data)} for c in chunks]  # full JSON preserved here
+    # Chroma caps the number of records per write.
+    for start in range(0, len(ids), WRITE_BATCH_SIZE):
+        end = start + WRITE_BATCH_SIZE
+        collection.upsert(
+            ids=ids[start:end],
+            documents=documents[start:end],
+            embeddings=embeddings[start:end],
+            metadatas=metadatas[start:end],
+        )
+    _bump_index_version(collection_name)
+
+
+def delete_ids(ids: list[str], collection_name: str):
+    if ids:
+        get_collection(collection_name).delete(ids=list(ids))
+        _bump_index_version(collection_name)
+
+
+def get_content_hashes(collection_name: str) -> dict[str, str]:
+    """Map of chunk id → content_hash for everything currently indexed."""
+    results = get_collection(collection_name).get(include=["metadatas"])
+    return {
+        id_: (meta or {}).get("content_hash", "")
+        for id_, meta in zip(results["ids"], results["metadatas"])
+    }
+
+
+def _resolve(hit_id: str, meta: dict | None) -> dict | None:
+    if meta and "data" in meta:
+        return json.loads(meta["data"])
+    return get_catalog().get(hit_id)
+
+
+def _filter_kwargs(where: dict | None) -> dict:
+    # Only send a filter when there is one; Chroma rejects an empty where.
+    return {"where": where} if where else {}
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+
+
+def _cached(
+    texts: list[str],
+    collection_name: str,
+    k: int,
+    shape: str,
+    where: dict | None,
+    run,
+) -> list[list]:
+    """
+    Serve each text from the query result cache; run(texts) is called once with
+    the (deduplicated) misses and its results are cached.
+    """
+    if settings.query_cache_ttl <= 0:
+        return run(texts)
+    cache = get_query_cache()
+    version = index_version(collection_name)
+    model, backend = get_embedder().model_name, settings.vector_backend
+    keys = [make_key(collection_name, t, k, shape, where, model, backend) for t in texts]
+    results = [cache.get(key, version) for key in keys]
+    missing: dict[tuple, str] = {}
+    for key, text, found in zip(keys, texts, results):
+        if found is None:
+            missing.setdefault(key, text)
+    if missing:
+        fresh = dict(zip(missing, run(list(missing.values()))))
+        for key, hits in fresh.items():
+            cache.put(key, version, hits)
+        results = [
+            found if found is not None else list(fresh[key])
+            for key, found in zip(keys, results)
+        ]
+    return results
+
+
+def query_cache_stats() -> QueryCacheStats:
+    """Snapshot of the query result cache counters."""
+    return get_query_cache().stats()
+
+
+def query(text: str, collection_name: str, k=5, where: dict | None = None) -> list[dict]:
+    """
+    Top-k records for text. where is a Chroma-style metadata filter, applied inside the index.
+    Results are cached (see query_cache) until the TTL passes or the collection is rewritten.
+    """
+    return _cached(
+        [text], collection_name, k, "records", where,
+        lambda texts: [_query_records(texts[0], collection_name, k, where)],
+    )[0]
+
+
+def _query_records(text: str, collection_name: str, k: int, where: dict | None) -> list[dict]:
+    collection = get_collection(collection_name)
+    results = collection.query(
+        query_embeddings=embed_texts([text]), n_results=k, **_filter_kwargs(where)
+    )
+    records = [
+        _resolve(id_, meta)
+        for id_, meta in zip(results["ids"][0], results["metadatas"][0])
+    ]
+    return [r for r in records if r is not None]
+
+
+def query_many(
+    texts: list[str],
+    collection_name: str,
+    k=5,
+    ids_only: bool = False,
+    where: dict | None = None,
+    embeddings: list | None = None,
+) -> list[list[QueryHit]]:
+    """
+    Run several queries in one Chroma call (one embedding request for the cache
+    misses + one ANN pass). Pass embeddings (one per text) to skip embedding here.
+    Returns one hit list per input text, in input order. With ids_only=True no
+    metadata is fetched and QueryHit.data is None; join with get_catalog().
+    where is a metadata filter shared by all texts and pushed into the index,
+    so only eligible records come back.
+    Texts answered by the query result cache are not sent to the index.
+    """
+    if not texts:
+        return []
+    vectors = dict(zip(texts, embeddings)) if embeddings is not None else None
+    return _cached(
+        list(texts), collection_name, k, "ids" if ids_only else "hits", where,
+        lambda misses: _query_hits(
+            misses, collection_name, k, ids_only, where,
+            [vectors[t] for t in misses] if vectors is not None else None,
+        ),
     )
 
-def query(text: str, collection_name: str, k=5) -> list[dict]:
+
+def _query_hits(
+    texts: list[str],
+    collection_name: str,
+    k: int,
+    ids_only: bool,
+    where: dict | None,
+    embeddings: list | None = None,
+) -> list[list[QueryHit]]:
     collection = get_collection(collection_name)
-    results = collection.query(query_texts=[text], n_results=k)
+    results = collection.query(
+        query_embeddings=embed_texts(list(texts)) if embeddings is None else embeddings,
+        n_results=k,
+        include=["distances"] if ids_only else ["metadatas", "distances"],
+        **_filter_kwargs(where),
+    )
+    if ids_only:
+        return [
+            [QueryHit(id=id_, distance=dist) for id_, dist in zip(ids, dists)]
+            for ids, dists in zip(results["ids"], results["distances"])
+        ]
     return [
-        json.loads(meta["data"])                    # returns your original JSON format
-        for meta in results["metadatas"][0]
+        [
+            QueryHit(id=id_, distance=dist, data=_resolve(id_, meta))
+            for id_, dist, meta in zip(ids, dists, metas)
+        ]
+        for ids, dists, metas in zip(
+            results["ids"], results["distances"], results["metadatas"]
+        )
     ]
 
 
+# ── Async API ─────────────────────────────────────────────────────────────────
+# Embedding requests and ANN search block, so the coroutines below offload them
+# to a small dedicated pool instead of stalling the event loop. The pool size
+# bounds how many blocking calls run at once across all sessions. Cancelling an
+# awaiting task drops a call that has not started yet; one already running
+# finishes in its thread and its result is discarded.
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix="vector-store")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking retrieval call on the vector-store pool and await it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def aquery(text: str, collection_name: str, k=5, where: dict | None = None) -> list[dict]:
+    return await run_blocking(query, text, collection_name, k=k, where=where)
+
+
+async def aquery_many(
+    texts: list[str],
+    collection_name: str,
+    k=5,
+    ids_only: bool = False,
+    where: dict | None = None,
+) -> list[list[QueryHit]]:
+    return await run_blocking(
+        query_many, texts, collection_name, k=k, ids_only=ids_only, where=where
+    )
+
+
+async def aadd_chunks(
+    chunks: list[Chunk],
+    collection_name: str,
+    store_data: bool = True,
+    embeddings: list | None = None,
+):
+    return await run_blocking(
+        add_chunks, chunks, collection_name, store_data=store_data, embeddings=embeddings
+    )
+
+
 if __name__ == "__main__":
     print(query("Machine Learning", "courses"))
@@ -43,8 +43,25 @@ class GapReport(BaseModel):
     tips_for_enhance: str
 
 
+# The GapReport fields the advisor LLM writes when the scores are computed locally
+# (ai/gap_scoring.py computes benchmark_score, matched/missing skills and top_gap).
+class GapNarrative(BaseModel):
+    top_gap_evidence: str
+    strength: str
+    weakness: str
+    tips_for_enhance: str
+
+
 class AdvisorReport(BaseModel):
     gap_report: GapReport
     study_plan: list[SemesterPlan]   # semester-organised course roadmap
     event_recs: list[EventRecommendation]  # 2–3 events from web search
     calendar_push_ready: bool = True
+
+
+# Advisor LLM output with local gap scoring; the orchestrator assembles the AdvisorReport.
+class AdvisorDraft(BaseModel):
+    gap_narrative: GapNarrative
+    study_plan: list[SemesterPlan]
+    event_recs: list[EventRecommendation]
+    calendar_push_ready: bool = True
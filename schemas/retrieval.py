@@ -1,3 +1,6 @@
+import hashlib
+import json
+
 from pydantic import BaseModel
 
 
@@ -6,6 +9,20 @@ class Chunk(BaseModel):
     text: str
     source: str
     data: dict
+    metadata: dict = {}   # scalar fields indexed for filter pushdown (str/int/float/bool)
+
+
+def content_hash(chunk: Chunk) -> str:
+    """Stable hash of everything that ends up in the index for this chunk."""
+    parts = [chunk.text, chunk.data] + ([chunk.metadata] if chunk.metadata else [])
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class QueryHit(BaseModel):
+    id: str
+    distance: float
+    data: dict | None = None   # None for id-only hits — join against the catalog
 
 def record_to_text(r: dict) -> str:
     skills = ", ".join(r.get("skills_taught", []))
@@ -20,9 +37,16 @@ def record_to_text(r: dict) -> str:
     )
 
 def extract_degree_abbr(degree_name: str) -> str:
-    """Extract abbreviation from degree name, e.g. 'Bachelor of Science in CS (BSCS)' → 'BSCS'."""
+    """
+    Extract abbreviation from degree name, e.g.
+    'Bachelor of Science in CS (BSCS)' → 'BSCS',
+    'BSCS - Bachelor of Science in Computer Science' → 'BSCS'.
+    """
     import re
-    m = re.search(r'\(([A-Z]+)\)', degree_name)
+    m = re.search(r'\(([A-Z][A-Za-z]*)\)', degree_name)
+    if m:
+        return m.group(1)
+    m = re.match(r'\s*([A-Z][A-Za-z]*)\s+[-–—]\s+', degree_name)
     return m.group(1) if m else degree_name.split()[-1]
 
 
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from retrieval.src.embedding_cache import EmbeddingCache
+
+
+class _CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_embed_only_sends_deduplicated_misses(self):
+        cache = EmbeddingCache(path=self.path)
+        embedder = _CountingEmbedder()
+
+        cache.embed("m", ["SQL  basics", "python"], embedder)
+        vectors = cache.embed("m", ["python", "SQL basics", "SQL basics", "java"], embedder)
+
+        self.assertEqual(embedder.calls, [["SQL basics", "python"], ["java"]])
+        self.assertEqual([v.tolist() for v in vectors], [[6.0, 1.0], [10.0, 1.0], [10.0, 1.0], [4.0, 1.0]])
+        stats = cache.stats()
+        self.assertEqual(stats.memory_hits, 3)
+        self.assertEqual(stats.misses, 3)
+        cache.close()
+
+    def test_disk_tier_survives_new_instance(self):
+        first = EmbeddingCache(path=self.path)
+        first.embed("m", ["machine learning"], _CountingEmbedder())
+        first.close()
+
+        second = EmbeddingCache(path=self.path)
+        embedder = _CountingEmbedder()
+        vectors = second.embed("m", ["machine learning"], embedder)
+
+        self.assertEqual(embedder.calls, [])
+        self.assertEqual(vectors[0].tolist(), [16.0, 1.0])
+        self.assertEqual(second.stats().disk_hits, 1)
+        self.assertEqual(second.stats().hit_rate, 1.0)
+        second.close()
+
+    def test_keys_are_scoped_by_model(self):
+        cache = EmbeddingCache(path=None)
+        embedder = _CountingEmbedder()
+
+        cache.embed("model-a", ["sql"], embedder)
+        cache.embed("model-b", ["sql"], embedder)
+
+        self.assertEqual(embedder.calls, [["sql"], ["sql"]])
+
+    def test_disk_tier_evicts_least_recently_used(self):
+        # Each vector is 2 float32 = 8 bytes; budget fits two rows.
+        cache = EmbeddingCache(path=self.path, max_memory_items=1, max_disk_bytes=16)
+        embedder = _CountingEmbedder()
+
+        for text in ["a", "bb", "ccc"]:
+            cache.embed("m", [text], embedder)
+
+        self.assertGreater(cache.stats().evictions, 0)
+        self.assertIsNone(cache.get_many("m", ["a"])[0])
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from datetime import date
+
+from ai.event_ranking import parse_event_date, parse_location, rank_events
+from retrieval.src.embeddings import get_embedder
+
+TODAY = date(2026, 10, 18)
+
+
+class TestEventParsing(unittest.TestCase):
+    def test_dates(self):
+        self.assertEqual(parse_event_date("Thu, Nov 12, 2026 · 6 PM", TODAY), date(2026, 11, 12))
+        self.assertEqual(parse_event_date("Starts 2026-12-01", TODAY), date(2026, 12, 1))
+        self.assertEqual(parse_event_date("Join us 3rd December", TODAY), date(2026, 12, 3))
+        # No year and well past: the next occurrence.
+        self.assertEqual(parse_event_date("March 5 hackathon", TODAY), date(2027, 3, 5))
+        self.assertIsNone(parse_event_date("Monthly data meetup", TODAY))
+
+    def test_locations(self):
+        self.assertEqual(parse_location("Meetup at WeWork, San Francisco"), "San Francisco")
+        self.assertEqual(parse_location("Sacramento, CA · In person"), "Sacramento")
+        self.assertEqual(parse_location("Free virtual webinar"), "Online")
+        self.assertIsNone(parse_location("Data Summit 2026"))
+
+
+class TestRankEvents(unittest.TestCase):
+    RESULTS = [
+        {"title": "Knitting Circle", "link": "https://example.org/knit",
+         "snippet": "Nov 2, 2026 in Oakland. Bring yarn."},
+        {"title": "Python Machine Learning Workshop | Eventbrite",
+         "link": "https://www.eventbrite.com/e/ml-workshop",
+         "snippet": "Nov 5, 2026 · San Francisco. Hands-on python machine learning."},
+        {"title": "Python Machine Learning Workshop - Meetup",
+         "link": "https://www.meetup.com/ml-workshop",
+         "snippet": "Nov 5, 2026 · San Francisco. Hands-on python machine learning."},
+        {"title": "Python ML Summit 2025", "link": "https://example.com/summit",
+         "snippet": "Sep 1, 2025 in San Jose."},
+        {"title": "SQL Analytics Night", "link": "https://example.com/sql/",
+         "snippet": "Online, Oct 30, 2026. SQL for analytics."},
+        {"title": "SQL Analytics Night", "link": "https://www.example.com/sql",
+         "snippet": "Online, Oct 30, 2026. SQL for analytics."},
+    ]
+
+    def test_drops_past_and_duplicates_and_ranks_by_skills(self):
+        events = rank_events(
+            self.RESULTS, ["Python", "Machine Learning", "SQL"],
+            today=TODAY, top_n=5, embedder=get_embedder("hashing"),
+        )
+
+        titles = [e["title"] for e in events]
+        self.assertEqual(len(titles), 3)
+        self.assertEqual(titles[0], "Python Machine Learning Workshop | Eventbrite")
+        self.assertEqual(titles[-1], "Knitting Circle")
+        self.assertEqual(events[0]["date"], "2026-11-05")
+        self.assertEqual(events[0]["location"], "San Francisco")
+        self.assertEqual(events[0]["organiser"], "eventbrite.com")
+
+    def test_top_n_limits_output(self):
+        events = rank_events(self.RESULTS, ["SQL"], today=TODAY, top_n=1,
+                             embedder=get_embedder("hashing"))
+
+        self.assertEqual([e["title"] for e in events], ["SQL Analytics Night"])
+
+
+if __name__ == "__main__":
+    unittest.main()
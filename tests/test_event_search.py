@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from ai import event_search
+from ai.event_search import EventSearchCache, get_http_client, query_variants, search_events
+from config import settings
+
+
+class _StandInSerper(BaseHTTPRequestHandler):
+    """Answers every query with one shared and one query-specific result."""
+
+    queries: list[str] = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.queries.append(body["q"])
+        organic = [
+            {"title": "Bay Area Data Summit", "link": "https://www.example.com/summit/"},
+            {"title": body["q"], "link": f"https://example.com/{body['q'].replace(' ', '-')}"},
+        ]
+        payload = json.dumps({"organic": organic}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestEventSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInSerper)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.endpoint = f"http://127.0.0.1:{cls.server.server_port}/search"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _StandInSerper.queries = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cache = EventSearchCache(os.path.join(self.tmp.name, "events.sqlite3"), ttl=60)
+        for patcher in (
+            patch.object(settings, "serper_endpoint", self.endpoint),
+            patch.object(event_search, "_cache", cache),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_fans_out_variants_and_dedups_urls(self):
+        async def run():
+            results = await search_events("data science", "key", variants=3)
+            await event_search.aclose_http_client()
+            return results
+
+        results = asyncio.run(run())
+
+        self.assertEqual(
+            sorted(_StandInSerper.queries),
+            ["data science", "data science meetup", "data science workshop"],
+        )
+        self.assertEqual(
+            [r["title"] for r in results],
+            ["Bay Area Data Summit", "data science", "data science meetup",
+             "data science workshop"],
+        )
+
+    def test_cached_responses_skip_the_network(self):
+        async def run():
+            first_client = get_http_client()
+            first = await search_events("Data  Science", "key", variants=2)
+            second = await search_events("data science", "key", variants=2)
+            same_client = get_http_client() is first_client
+            await event_search.aclose_http_client()
+            return first, second, same_client
+
+        first, second, same_client = asyncio.run(run())
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(_StandInSerper.queries), 2)
+        self.assertTrue(same_client)
+
+    def test_run_uniflow_closes_the_loops_client(self):
+        from ai import orchestrator
+
+        clients = []
+
+        async def pipeline(*args):
+            clients.append(get_http_client())
+            raise ValueError("stop")
+
+        with patch.object(orchestrator, "_run_pipeline", pipeline):
+            with self.assertRaises(ValueError):
+                asyncio.run(orchestrator.run_uniflow("r.pdf", "t.pdf", "DS", "MSDS", 30, None))
+
+        self.assertTrue(clients[0].is_closed)
+
+    def test_variants_skip_suffixes_already_in_query(self):
+        self.assertEqual(
+            query_variants("AI meetup San Francisco", 3),
+            ["AI meetup San Francisco", "AI meetup San Francisco workshop",
+             "AI meetup San Francisco career fair"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
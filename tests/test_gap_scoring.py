@@ -0,0 +1,100 @@
+import unittest
+
+from ai.gap_scoring import score_gap
+from retrieval.src.embeddings import get_embedder
+from schemas.agent1 import PositionProfile
+from schemas.agent2 import GapNarrative
+from schemas.inputs import ResumeData, WorkExperience
+
+
+def _profile(must_have, nice_to_have=()):
+    return PositionProfile(
+        required_skills=list(must_have),
+        must_have=list(must_have),
+        nice_to_have=list(nice_to_have),
+        seniority_indicators=[],
+        industry_scope="",
+        interview_topics=[],
+    )
+
+
+class TestGapScoring(unittest.TestCase):
+    def setUp(self):
+        self.embedder = get_embedder("hashing")
+        self.resume = ResumeData(
+            full_name="Test Student",
+            skills=["python", "ML"],
+            work_experience=[WorkExperience(
+                company="Acme", role="Analyst", duration="2023",
+                highlights=[
+                    "Cut report time by 40% with SQL and Python",
+                    "Built SQL dashboards for the finance team",
+                ],
+            )],
+        )
+
+    def test_weighted_score_and_skill_lists(self):
+        profile = _profile(["Python", "SQL", "Machine Learning", "Docker"], ["Tableau"])
+
+        gap = score_gap(self.resume, profile, embedder=self.embedder)
+
+        self.assertEqual(
+            gap.points,
+            {"Python": 1.0, "SQL": 1.0, "Machine Learning": 0.5, "Docker": 0.0, "Tableau": 0.0},
+        )
+        self.assertEqual(gap.benchmark_score, round(100 * 5 / 9))
+        self.assertEqual(gap.matched_skills, ["Python", "SQL", "Machine Learning"])
+        self.assertEqual(gap.missing_skills, ["Docker", "Tableau"])
+        self.assertEqual(gap.top_gap, "• Docker\n• Machine Learning")
+
+    def test_caps_without_strong_evidence(self):
+        resume = ResumeData(full_name="Test Student", skills=["Python", "SQL"])
+
+        gap = score_gap(resume, _profile(["Python", "SQL"]), embedder=self.embedder)
+
+        self.assertEqual(gap.benchmark_score, 50)
+        resume.work_experience = [WorkExperience(
+            company="Acme", role="Engineer", duration="2024",
+            highlights=[
+                "Shipped Python services to 2k users", "Tuned Python jobs", "Owned SQL migrations",
+            ],
+        )]
+        gap = score_gap(resume, _profile(["Python", "SQL"]), embedder=self.embedder)
+        self.assertEqual(gap.benchmark_score, 78)   # only Python is strong
+
+    def test_punctuation_does_not_hide_skills(self):
+        resume = ResumeData(full_name="Test Student", skills=[], work_experience=[WorkExperience(
+            company="Acme", role="Analyst", duration="2024",
+            highlights=["Built dashboards in Tableau, Python and SQL."],
+        )])
+
+        gap = score_gap(resume, _profile(["Python", "SQL", "Tableau"]), embedder=self.embedder)
+
+        self.assertEqual(gap.points, {"Python": 0.75, "SQL": 0.75, "Tableau": 0.75})
+
+    def test_version_numbers_are_not_measurable_impact(self):
+        resume = ResumeData(full_name="Test Student", skills=[], work_experience=[WorkExperience(
+            company="Acme", role="Engineer", duration="2024",
+            highlights=["Ported scripts to Python 3", "Wrote Java 8 services in 2023"],
+        )])
+
+        gap = score_gap(resume, _profile(["Python", "Java"]), embedder=self.embedder)
+
+        self.assertEqual(gap.points, {"Python": 0.75, "Java": 0.75})
+        self.assertEqual(gap.benchmark_score, 70)
+
+    def test_report_combines_scores_and_narrative(self):
+        gap = score_gap(self.resume, _profile(["Docker"]), embedder=self.embedder)
+        narrative = GapNarrative(
+            top_gap_evidence="e", strength="s", weakness="w", tips_for_enhance="t"
+        )
+
+        report = gap.to_report(narrative)
+
+        self.assertEqual(report.missing_skills, ["Docker"])
+        self.assertEqual(report.top_gap, "• Docker")
+        self.assertEqual(report.strength, "s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from retrieval.src.numpy_backend import NumpyCollection
+
+
+def _unit(rows):
+    m = np.asarray(rows, dtype=np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+class TestNumpyCollection(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.vectors = _unit(rng.normal(size=(200, 16)))
+        self.ids = [f"C-{i}" for i in range(200)]
+        self.metas = [
+            {"department": "CS" if i % 2 else "BUS", "credits": 1 if i % 5 == 0 else 3}
+            for i in range(200)
+        ]
+
+    def _collection(self, directory=None):
+        col = NumpyCollection("courses", directory=directory)
+        col.upsert(ids=self.ids, embeddings=self.vectors, metadatas=self.metas)
+        return col
+
+    def test_batched_query_is_exact_and_sorted(self):
+        col = self._collection()
+        queries = self.vectors[[3, 42]]
+
+        result = col.query(query_embeddings=queries, n_results=5, include=["distances"])
+
+        expected = np.argsort(-(queries @ self.vectors.T), axis=1)[:, :5]
+        self.assertEqual(result["ids"], [[self.ids[i] for i in row] for row in expected])
+        self.assertEqual(result["ids"][0][0], "C-3")
+        self.assertAlmostEqual(result["distances"][1][0], 0.0, places=5)
+        self.assertTrue(all(d == sorted(d) for d in result["distances"]))
+        self.assertNotIn("metadatas", result)
+
+    def test_where_and_id_masks(self):
+        col = self._collection()
+
+        result = col.query(
+            query_embeddings=self.vectors[:1],
+            n_results=50,
+            where={"$and": [{"department": "CS"}, {"credits": {"$gte": 3}}]},
+            ids=self.ids[:20],
+        )
+
+        expected = {f"C-{i}" for i in range(20) if i % 2 and i % 5}
+        self.assertEqual(set(result["ids"][0]), expected)
+        self.assertEqual(len(result["ids"][0]), len(expected))
+
+    def test_upsert_delete_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            col = self._collection(tmp)
+            col.upsert(ids=["C-0", "NEW-1"], embeddings=self.vectors[:2] * 3, metadatas=[{"v": 2}, {"v": 1}])
+            col.delete(ids=["C-1", "missing"])
+
+            reloaded = NumpyCollection("courses", directory=tmp, mmap=True)
+
+            self.assertEqual(reloaded.count(), 200)
+            got = reloaded.get(ids=["C-0", "NEW-1"], include=["metadatas"])
+            self.assertEqual(got["metadatas"], [{"v": 2}, {"v": 1}])
+            top = reloaded.query(query_embeddings=self.vectors[:1], n_results=1)
+            self.assertIn(top["ids"][0][0], {"C-0", "NEW-1"})
+
+    def test_quantized_storage_is_compact_and_rescoring_is_exact(self):
+        queries = self.vectors[[3, 42, 99]]
+        exact = self._collection().query(query_embeddings=queries, n_results=10)
+
+        # float32 is 200 × 16 × 4 bytes; int8 adds one float32 scale per row.
+        self.assertEqual(self._collection().nbytes, 12800)
+        for dtype, nbytes in (("float16", 6400), ("int8", 3200 + 800)):
+            with tempfile.TemporaryDirectory() as tmp:
+                # The float32 rows stay in the mapped file, not in the count.
+                col = NumpyCollection("courses", directory=tmp, dtype=dtype)
+                col.upsert(ids=self.ids, embeddings=self.vectors, metadatas=self.metas)
+                self.assertEqual(col.nbytes, nbytes)
+
+                approx = col.query(query_embeddings=queries, n_results=10)
+                overlap = [len(set(a) & set(b)) for a, b in zip(approx["ids"], exact["ids"])]
+                self.assertGreaterEqual(min(overlap), 8)
+
+                col.rescore = 4
+                rescored = col.query(query_embeddings=queries, n_results=10)
+                self.assertEqual(rescored["ids"], exact["ids"])
+                np.testing.assert_allclose(rescored["distances"], exact["distances"], atol=1e-5)
+
+    def test_in_memory_quantized_keeps_no_float32_copy(self):
+        col = NumpyCollection("courses", dtype="int8")
+        col.upsert(ids=self.ids, embeddings=self.vectors, metadatas=self.metas)
+        col.delete(ids=["C-1"])
+
+        self.assertIsNone(col._matrix)
+        self.assertEqual(col.nbytes, 199 * 16 + 199 * 4)
+        got = col.get(ids=["C-2"], include=["embeddings"])["embeddings"]
+        np.testing.assert_allclose(got[0], self.vectors[2], atol=0.01)
+        with self.assertRaises(ValueError):
+            NumpyCollection("courses", dtype="int8", rescore=4)
+
+    def test_quantized_reload_keeps_float32_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._collection(tmp)
+            col = NumpyCollection("courses", directory=tmp, dtype="int8", rescore=2)
+
+            self.assertEqual(col._codes.dtype, np.int8)
+            self.assertIsInstance(col._matrix, np.memmap)
+            filtered = col.query(
+                query_embeddings=self.vectors[:1], n_results=3, where={"department": "BUS"}
+            )
+            self.assertEqual(filtered["ids"][0][0], "C-0")
+            self.assertTrue(all(int(i[2:]) % 2 == 0 for i in filtered["ids"][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
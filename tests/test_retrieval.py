@@ -1,26 +1,56 @@
+import asyncio
 import json
+import os
+import tempfile
+import time
 import unittest
 from unittest.mock import patch
 
-from schemas.retrieval import Chunk
+from schemas.retrieval import Chunk, QueryHit, content_hash
 from retrieval.src import vector_store
+from retrieval.src.catalog import get_catalog
+from retrieval.src.indexer import iter_records, token_batches
+from retrieval.src.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+from retrieval.src.query_cache import QueryResultCache, get_query_cache
+from retrieval.src.rerank import CrossEncoderReranker
+from retrieval.src.search import CourseFilter
+from retrieval.src.selection import Candidate, score_candidate, select_courses
 
 
 class _FakeCollection:
     def __init__(self, query_payload=None):
         self.add_kwargs = None
         self.query_kwargs = None
+        self.query_calls = 0
         self._query_payload = query_payload or {"metadatas": [[]]}
 
     def add(self, **kwargs):
         self.add_kwargs = kwargs
 
+    def upsert(self, **kwargs):
+        self.add_kwargs = kwargs
+
     def query(self, **kwargs):
         self.query_kwargs = kwargs
+        self.query_calls += 1
         return self._query_payload
 
 
+def _fake_embed(texts):
+    return [[float(len(t))] for t in texts]
+
+
 class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        # Keep index version stamps out of the repo's vector_db and start each
+        # test with an empty query result cache.
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        db_path = patch.object(vector_store, "VECTOR_DB_PATH", tmp.name)
+        db_path.start()
+        self.addCleanup(db_path.stop)
+        get_query_cache().clear()
+
     def test_add_chunks_serializes_chunk_data(self):
         fake = _FakeCollection()
         chunks = [
@@ -36,8 +66,9 @@ class TestVectorStore(unittest.TestCase):
             ),
         ]
 
-        with patch.object(vector_store, "get_collection", return_value=fake):
-            vector_store.add_chunks(chunks)
+        with patch.object(vector_store, "get_collection", return_value=fake), \
+                patch.object(vector_store, "embed_texts", side_effect=_fake_embed):
+            vector_store.add_chunks(chunks, "courses")
 
         print("add_chunks payload:", fake.add_kwargs)
         self.assertIsNotNone(fake.add_kwargs)
@@ -46,11 +77,12 @@ class TestVectorStore(unittest.TestCase):
             fake.add_kwargs["documents"],
             ["Course: Product Strategy", "Course: Data Analysis"],
         )
+        self.assertEqual(fake.add_kwargs["embeddings"], [[24.0], [21.0]])
         self.assertEqual(
             fake.add_kwargs["metadatas"],
             [
-                {"data": json.dumps(chunks[0].data)},
-                {"data": json.dumps(chunks[1].data)},
+                {"content_hash": content_hash(chunks[0]), "data": json.dumps(chunks[0].data)},
+                {"content_hash": content_hash(chunks[1]), "data": json.dumps(chunks[1].data)},
             ],
         )
 
@@ -74,6 +106,7 @@ class TestVectorStore(unittest.TestCase):
 
         fake = _FakeCollection(
             query_payload={
+                "ids": [["BUS-412", "CS-305"]],
                 "metadatas": [
                     [
                         {"data": json.dumps(full_course_1)},
@@ -83,8 +116,9 @@ class TestVectorStore(unittest.TestCase):
             }
         )
 
-        with patch.object(vector_store, "get_collection", return_value=fake):
-            results = vector_store.query("roadmap course", k=2)
+        with patch.object(vector_store, "get_collection", return_value=fake), \
+                patch.object(vector_store, "embed_texts", side_effect=_fake_embed):
+            results = vector_store.query("roadmap course", "courses", k=2)
 
         print("query results:", results)
         print("query kwargs:", fake.query_kwargs)
@@ -94,8 +128,633 @@ class TestVectorStore(unittest.TestCase):
         )
         self.assertEqual(
             fake.query_kwargs,
-            {"query_texts": ["roadmap course"], "n_results": 2},
+            {"query_embeddings": [[14.0]], "n_results": 2},
+        )
+
+    def test_query_many_batches_texts_in_one_call(self):
+        course_a = {"course_id": "CS-305", "title": "Applied Data Analysis"}
+        course_b = {"course_id": "BUS-412", "title": "Product Strategy"}
+        fake = _FakeCollection(
+            query_payload={
+                "ids": [["CS-305", "BUS-412"], ["BUS-412"]],
+                "distances": [[0.1, 0.4], [0.2]],
+                "metadatas": [
+                    [{"data": json.dumps(course_a)}, {"data": json.dumps(course_b)}],
+                    [{"data": json.dumps(course_b)}],
+                ],
+            }
+        )
+
+        with patch.object(vector_store, "get_collection", return_value=fake), \
+                patch.object(vector_store, "embed_texts", side_effect=_fake_embed) as embed:
+            results = vector_store.query_many(["sql", "roadmap"], "courses", k=2)
+
+        embed.assert_called_once_with(["sql", "roadmap"])
+        self.assertEqual(fake.query_kwargs["query_embeddings"], [[3.0], [7.0]])
+        self.assertEqual(fake.query_kwargs["n_results"], 2)
+        self.assertEqual([[h.id for h in hits] for hits in results], [["CS-305", "BUS-412"], ["BUS-412"]])
+        self.assertEqual(results[0][1].distance, 0.4)
+        self.assertEqual(results[1][0].data, course_b)
+
+    def test_query_many_ids_only_joins_against_catalog(self):
+        fake = _FakeCollection(
+            query_payload={"ids": [["APP-101", "NOPE-999"]], "distances": [[0.3, 0.5]]}
+        )
+
+        with patch.object(vector_store, "get_collection", return_value=fake), \
+                patch.object(vector_store, "embed_texts", side_effect=_fake_embed):
+            hits = vector_store.query_many(["story"], "courses", k=2, ids_only=True)[0]
+
+        self.assertEqual(fake.query_kwargs["include"], ["distances"])
+        self.assertEqual([h.data for h in hits], [None, None])
+        records = get_catalog().join(hits)
+        self.assertEqual([r["course_id"] for r in records], ["APP-101"])
+        self.assertIs(get_catalog().get("app101"), records[0])
+
+    def test_aquery_many_runs_off_the_event_loop(self):
+        fake = _FakeCollection(query_payload={"ids": [["APP-101"]], "distances": [[0.3]]})
+
+        async def run():
+            # A concurrent coroutine keeps making progress while the query runs.
+            ticker = asyncio.create_task(asyncio.sleep(0))
+            hits = await vector_store.aquery_many(["story"], "courses", k=1, ids_only=True)
+            await ticker
+            return hits
+
+        with patch.object(vector_store, "get_collection", return_value=fake), \
+                patch.object(vector_store, "embed_texts", side_effect=_fake_embed):
+            hits = asyncio.run(run())
+
+        self.assertEqual([[h.id for h in row] for row in hits], [["APP-101"]])
+
+    def test_query_many_serves_repeats_from_cache_until_index_changes(self):
+        fake = _FakeCollection(query_payload={"ids": [["APP-101"]], "distances": [[0.3]]})
+
+        with patch.object(vector_store, "get_collection", return_value=fake), \
+                patch.object(vector_store, "embed_texts", side_effect=_fake_embed):
+            first = vector_store.query_many(["data  analyst"], "courses", k=1, ids_only=True)
+            again = vector_store.query_many(["data analyst"], "courses", k=1, ids_only=True)
+            self.assertEqual(fake.query_calls, 1)
+            self.assertEqual(again, first)
+
+            vector_store.add_chunks([Chunk(text="x", source="APP-101", data={})], "courses")
+            vector_store.query_many(["data analyst"], "courses", k=1, ids_only=True)
+
+        self.assertEqual(fake.query_calls, 2)
+        self.assertEqual(vector_store.query_cache_stats().invalidated, 1)
+
+
+class TestQueryResultCache(unittest.TestCase):
+    def test_ttl_and_lru_bound(self):
+        now = [0.0]
+        cache = QueryResultCache(max_items=2, ttl=10, clock=lambda: now[0])
+        cache.put(("a",), 1, ["A"])
+        cache.put(("b",), 1, ["B"])
+        self.assertEqual(cache.get(("a",), 1), ["A"])   # a is now most recent
+        cache.put(("c",), 1, ["C"])                     # evicts b
+
+        self.assertIsNone(cache.get(("b",), 1))
+        self.assertIsNone(cache.get(("a",), 2))         # older index version
+        now[0] = 11.0
+        self.assertIsNone(cache.get(("c",), 1))         # expired
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.evictions, stats.invalidated, stats.expired), (1, 1, 1, 1))
+        self.assertEqual(len(cache), 0)
+
+
+class TestRerank(unittest.TestCase):
+    def _hits(self, *ids):
+        return [QueryHit(id=id_, distance=0.1 * i) for i, id_ in enumerate(ids)]
+
+    def test_reorders_by_score_and_caches_pairs(self):
+        calls = []
+
+        def scorer(pairs):
+            calls.append(len(pairs))
+            return [1.0 if "Story" in text else 0.0 for _, text in pairs]
+
+        reranker = CrossEncoderReranker(scorer=scorer, batch_size=2)
+        hits = self._hits("APP-104", "APP-101", "NOPE-999")
+
+        ranked = reranker.rerank("storytelling", hits)
+        again = reranker.rerank("storytelling ", hits)
+
+        self.assertEqual([h.id for h in ranked], ["APP-101", "APP-104", "NOPE-999"])
+        self.assertEqual([h.id for h in again], [h.id for h in ranked])
+        self.assertEqual(calls, [2])
+        self.assertEqual(reranker.stats().cache_hits, 2)
+
+    def test_budget_exhausted_keeps_embedding_order(self):
+        def slow(pairs):
+            time.sleep(0.02)
+            return [float(i) for i in range(len(pairs))]
+
+        reranker = CrossEncoderReranker(scorer=slow, batch_size=1, budget_ms=5)
+        hits = self._hits("APP-104", "APP-101")
+
+        self.assertEqual(reranker.rerank("data", hits), hits)
+        self.assertEqual(reranker.stats().fallbacks, 1)
+
+    def test_late_scores_are_discarded_and_slow_batches_skipped(self):
+        calls = []
+
+        def slow(pairs):
+            calls.append(len(pairs))
+            time.sleep(0.05)
+            return [-float(i) for i in range(len(pairs))]
+
+        # One batch covers every hit: it runs, finishes past the budget, and is discarded.
+        reranker = CrossEncoderReranker(scorer=slow, batch_size=16, budget_ms=20)
+        hits = self._hits("APP-104", "APP-101", "NOPE-999")
+        self.assertEqual(reranker.rerank("data", hits), hits)
+
+        # Now the cost per pair is known, so an over-budget batch never starts.
+        started = time.perf_counter()
+        self.assertEqual(reranker.rerank("other", hits), hits)
+        self.assertLess(time.perf_counter() - started, 0.02)
+        self.assertEqual(calls, [2])
+        self.assertEqual(reranker.stats().fallbacks, 2)
+
+
+class TestRequirementsIndex(unittest.TestCase):
+    def _degree(self, mandatory_credits):
+        return [{
+            "degree_name": "MSDS - Master of Science in Data Science",
+            "course_requirements": [
+                {"category": "Core", "credits_required": mandatory_credits, "courses": [
+                    {"code": "DS500", "title": "A", "credits": 3},
+                    {"code": "DS-501", "title": "B", "credits": 3},
+                ]},
+            ],
+        }]
+
+    def test_lookup_by_alias_and_reload_on_change(self):
+        from retrieval.src.requirements import get_requirements
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/requirements.json"
+            with open(path, "w") as f:
+                json.dump(self._degree(6), f)
+            index = get_requirements(path)
+
+            for name in ("MSDS", "master of science in  data science", "MSDS - Master of Science in Data Science"):
+                self.assertEqual(index.lookup(name).abbr, "MSDS")
+            core = index.lookup("MSDS").categories[0]
+            self.assertEqual(core.codes, {"DS500", "DS501"})
+            self.assertTrue(core.all_mandatory)
+            self.assertIs(get_requirements(path), index)
+
+            with open(path, "w") as f:
+                json.dump(self._degree(3), f)
+            os.utime(path, ns=(1, os.stat(path).st_mtime_ns + 1_000_000))
+            reloaded = get_requirements(path)
+
+        self.assertIsNot(reloaded, index)
+        self.assertEqual(reloaded.lookup("MSDS").selection_codes, {"DS500", "DS501"})
+
+
+class TestCourseSelection(unittest.TestCase):
+    def test_knapsack_hits_target_exactly_where_greedy_overshoots(self):
+        candidates = [
+            Candidate("A", 3, 0.9),
+            Candidate("B", 3, 0.8),
+            Candidate("LAB1", 1, 0.5),
+            Candidate("LAB2", 1, 0.4),
+        ]
+        # Greedy in rank order takes A + B = 6 credits for a 5-credit gap.
+        chosen = select_courses(candidates, 5)
+
+        self.assertEqual([c.code for c in chosen], ["A", "LAB1", "LAB2"])
+
+    def test_prefers_skill_coverage_at_equal_credits(self):
+        from retrieval.src.selection import select_covering
+        from retrieval.src.skill_index import SkillIndex
+
+        index = SkillIndex([
+            {"course_id": "TOP-1", "skills_taught": ["Statistics"]},
+            {"course_id": "SQL-1", "skills_taught": ["SQL", "Data Modeling"]},
+        ])
+        missing = ["sql", "tableau"]
+        cover = index.coverage(missing)
+        candidates = [
+            Candidate(code, 3, score_candidate(relevance, cover.get(code, 0).bit_count() / 2))
+            for code, relevance in (("TOP1", 1.0), ("SQL1", 0.6))
+        ]
+
+        self.assertEqual(cover, {"SQL1": 0b01})
+        self.assertEqual([c.code for c in select_courses(candidates, 3)], ["SQL1"])
+        self.assertEqual([c.code for c in select_covering(candidates, cover, 3)], ["SQL1"])
+
+    def test_labs_only_come_with_their_lecture(self):
+        candidates = [
+            Candidate("BAN470", 3, 0.9),
+            Candidate("CS483", 3, 0.5),
+            Candidate("CS483L", 1, 0.8),
+            Candidate("CS483LG", 1, 0.8),
+            Candidate("CS457LG", 1, 0.7),
+            Candidate("CS457L", 1, 0.7),
+        ]
+        # 3 + 1 + 1 = 5 from orphan labs is not allowed; one CS483 lab joins its lecture.
+        chosen = select_courses(candidates, 4)
+        self.assertEqual([c.code for c in chosen], ["CS483", "CS483L"])
+
+        # The lecture is already planned, so its lab may come alone, but only one version.
+        chosen = select_courses(candidates, 4, planned={"CS457"})
+        self.assertEqual([c.code for c in chosen], ["BAN470", "CS457LG"])
+
+        # The graduate version of the lab is planned: the undergraduate one is not picked.
+        chosen = select_courses(candidates, 4, planned={"CS457", "CS457LG"})
+        self.assertEqual([c.code for c in chosen], ["CS483", "CS483L"])
+
+    def test_time_budget_falls_back_to_greedy(self):
+        candidates = [Candidate(f"C{i}", 3, 1.0 / (i + 1)) for i in range(10)]
+        chosen = select_courses(candidates, 6, time_budget_ms=-1)
+
+        self.assertEqual([c.code for c in chosen], ["C0", "C1"])
+
+
+class TestSkillOntology(unittest.TestCase):
+    RECORDS = [
+        {"course_id": "DS-510", "skills_taught": ["Machine learning", "Data visualization"]},
+        {"course_id": "DS-520", "skills_taught": ["Natural language processing (NLP)"]},
+        {"course_id": "DS-530", "skills_taught": ["Data visualisation"]},
+    ]
+
+    def test_aliases_fold_spellings_and_abbreviations(self):
+        from retrieval.src.skill_ontology import build_ontology
+
+        ontology = build_ontology(self.RECORDS)
+
+        self.assertEqual(
+            {ontology.normalize(s) for s in ("ML", "Machine-learning", "machine  learning")},
+            {"machine learning"},
+        )
+        self.assertEqual(ontology.normalize("NLP"), "natural language processing")
+        self.assertEqual(ontology.normalize("Natural Language Processing (NLP)"),
+                         "natural language processing")
+
+    def test_clusters_and_nearest_lookup_use_embeddings(self):
+        from retrieval.src.embeddings import get_embedder
+        from retrieval.src.skill_ontology import SkillOntology, build_ontology
+
+        embedder = get_embedder("hashing")
+        ontology = build_ontology(self.RECORDS, embedder, threshold=0.8)
+        with tempfile.TemporaryDirectory() as tmp:
+            ontology.save(os.path.join(tmp, "ontology.npz"))
+            loaded = SkillOntology.load(os.path.join(tmp, "ontology.npz"))
+
+        self.assertEqual(loaded.normalize("Data visualisation"), "data visualization")
+        self.assertEqual(
+            loaded.normalize_many(["data visualizations", "Quantum chemistry"], embedder),
+            ["data visualization", "quantum chemistry"],
+        )
+
+    def test_missing_skills_compare_canonical_names(self):
+        from retrieval.src.retriever import RetrieverDeps, student_queries
+
+        deps = RetrieverDeps(
+            skill_benchmark=["Machine Learning", "SQL"], student_skills=["ML"]
+        )
+
+        self.assertEqual(student_queries(deps)[2], ["SQL"])
+
+
+class TestSkillIndex(unittest.TestCase):
+    def setUp(self):
+        from retrieval.src.skill_index import SkillIndex
+
+        self.index = SkillIndex([
+            {"course_id": "CS-305", "skills_taught": ["SQL", "Data modeling"]},
+            {"course_id": "DS-510", "skills_taught": ["Machine-learning", "Python"]},
+            {"course_id": "DS-520", "skills_taught": ["Advanced SQL", "Tableau"]},
+            {"course_id": "ST-200", "skills_taught": ["Regression"]},
+        ])
+
+    def test_coverage_is_a_bitset_over_missing_skills(self):
+        cover = self.index.coverage(["sql", "Machine Learning", "Tableau", "R"])
+
+        self.assertEqual(cover, {"CS305": 0b0001, "DS520": 0b0101, "DS510": 0b0010})
+        self.assertEqual(self.index.courses_by_skill["machine learning"], {"DS510"})
+
+    def test_set_cover_spreads_electives_over_missing_skills(self):
+        from retrieval.src.selection import select_covering
+
+        cover = self.index.coverage(["SQL", "Machine Learning", "Tableau"])
+        # CS305 ranks best but only repeats SQL, which DS520 also covers.
+        candidates = [
+            Candidate("CS305", 3, 1.5),
+            Candidate("DS520", 3, 1.0),
+            Candidate("DS510", 3, 0.8),
+        ]
+
+        chosen = select_covering(candidates, cover, 6)
+
+        self.assertEqual([c.code for c in chosen], ["DS520", "DS510"])
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        from retrieval.src.scheduler import PrerequisiteGraph
+
+        self.graph = PrerequisiteGraph([
+            {"course_id": "CS-101", "prerequisites": []},
+            {"course_id": "CS-201", "prerequisites": ["CS-101", "Senior standing"]},
+            {"course_id": "CS-301", "prerequisites": ["CS-201"]},
+            {"course_id": "CS-305", "prerequisites": []},
+            {"course_id": "CS-495", "prerequisites": ["Final semester of program"]},
+            {"course_id": "CS-499", "prerequisites": ["CS-301"]},
+        ])
+
+    def _course(self, code, credits=3):
+        return {"course_id": code, "credits": credits}
+
+    def test_closure_and_final_semester_flag(self):
+        self.assertEqual(self.graph.prerequisites("CS499"), {"CS101", "CS201", "CS301"})
+        self.assertEqual(self.graph.prerequisites("CS-201", transitive=False), {"CS101"})
+        self.assertTrue(self.graph.is_final_only("CS495"))
+
+    def test_prerequisites_come_first_and_capstone_last(self):
+        from retrieval.src.scheduler import schedule_semesters
+
+        # Listed in the worst order: dependents before their prerequisites.
+        plan = [self._course(c) for c in ("CS499", "CS495", "CS301", "CS305", "CS201", "CS101")]
+        semesters = schedule_semesters(plan, 3, capstone_id="CS-499", graph=self.graph)
+
+        order = {c["course_id"]: i for i, sem in enumerate(semesters) for c in sem}
+        self.assertLess(order["CS101"], order["CS201"])
+        self.assertLess(order["CS201"], order["CS301"])
+        self.assertLess(order["CS301"], order["CS499"])
+        self.assertLessEqual({"CS495", "CS499"}, {c["course_id"] for c in semesters[-1]})
+        self.assertEqual(sorted(order), sorted(c["course_id"] for c in plan))
+
+    def test_balances_load_against_min_credits(self):
+        from retrieval.src.scheduler import schedule_semesters
+
+        plan = [self._course(f"X{i}") for i in range(8)] + [self._course("LAB", 1)]
+        semesters = schedule_semesters(plan, 12, graph=self.graph)
+
+        self.assertEqual([sum(c["credits"] for c in s) for s in semesters], [12, 13])
+
+    def test_lab_shares_its_lectures_semester(self):
+        from retrieval.src.scheduler import schedule_semesters
+
+        # CS301L is listed far from CS301, and CS305 alone would fill a semester's share.
+        plan = [self._course(c) for c in ("CS301L", "CS101", "CS305", "CS201", "CS301")]
+        plan[0]["credits"] = 1
+        semesters = schedule_semesters(plan, 3, graph=self.graph)
+
+        order = {c["course_id"]: i for i, sem in enumerate(semesters) for c in sem}
+        self.assertEqual(order["CS301L"], order["CS301"])
+        self.assertLess(order["CS201"], order["CS301"])
+        lab_semester = [c["course_id"] for c in semesters[order["CS301"]]]
+        self.assertEqual(lab_semester.index("CS301L"), lab_semester.index("CS301") + 1)
+
+
+class TestPlanCourses(unittest.TestCase):
+    def test_plans_required_courses_without_llm(self):
+        from config import settings
+        from retrieval.src.retriever import RetrieverDeps, plan_courses
+
+        deps = RetrieverDeps(
+            program_enrolled="MSDS - Master of Science in Data Science",
+            completed_ids={"DS-501"},
+            credits_remaining=30,
+            skill_benchmark=["Python", "SQL", "Machine Learning"],
+            student_skills=["Python"],
+        )
+        with patch.object(settings, "retrieval_mode", "lexical"):
+            courses = plan_courses(deps)
+
+        ids = [c.course_id for c in courses]
+        self.assertTrue(courses)
+        self.assertNotIn("DS501", ids)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertGreaterEqual(sum(c.credits for c in courses), 30)
+        self.assertTrue(all(c.skills_covered for c in courses))
+
+    def test_embeds_both_plan_queries_in_one_call(self):
+        from config import settings
+        from retrieval.src.retriever import RetrieverDeps, plan_courses
+
+        deps = RetrieverDeps(
+            program_enrolled="MSDS - Master of Science in Data Science",
+            credits_remaining=30,
+            skill_benchmark=["Python", "SQL", "Machine Learning"],
+            student_skills=["Python"],
+        )
+        embed_calls, searched = [], []
+
+        def embed(texts):
+            embed_calls.append(list(texts))
+            return [[float(i)] for i in range(len(texts))]
+
+        def query_many(texts, *args, embeddings=None, **kwargs):
+            searched.append(embeddings)
+            return [[] for _ in texts]
+
+        with (
+            patch.object(settings, "retrieval_mode", "vector"),
+            patch("retrieval.src.search.embed_texts", side_effect=embed),
+            patch("retrieval.src.search.query_many", side_effect=query_many),
+        ):
+            plan_courses(deps)
+
+        self.assertEqual(embed_calls, [["Python SQL Machine Learning", "SQL Machine Learning"]])
+        self.assertEqual(searched, [[[0.0]], [[1.0]]])
+
+
+class TestCohortPlanning(unittest.TestCase):
+    def test_plans_each_student_with_completed_courses_masked(self):
+        from retrieval.src.cohort import plan_cohort
+        from retrieval.src.embeddings import get_embedder
+        from retrieval.src.retriever import RetrieverDeps
+
+        msds = RetrieverDeps(
+            program_enrolled="MSDS - Master of Science in Data Science",
+            completed_ids={"DS-501"},
+            credits_remaining=30,
+            skill_benchmark=["Python", "SQL", "Machine Learning"],
+            student_skills=["Python"],
+        )
+        unknown = RetrieverDeps(program_enrolled="Unknown Degree", credits_remaining=30)
+
+        result = plan_cohort([msds, unknown, msds], embedder=get_embedder("hashing"))
+
+        self.assertEqual(len(result.plans), 3)
+        first, missing, again = result.plans
+        ids = [c.course_id for c in first]
+        self.assertTrue(first)
+        self.assertNotIn("DS501", ids)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertGreaterEqual(sum(c.credits for c in first), 30)
+        self.assertEqual(missing, [])
+        self.assertEqual(again, first)
+        self.assertGreater(result.plans_per_second, 0)
+
+
+class TestIncrementalIndex(unittest.TestCase):
+    def test_ingest_only_writes_new_and_changed_chunks(self):
+        from retrieval.src.indexer import ingest
+        from retrieval.src.numpy_backend import NumpyCollection
+
+        same = Chunk(text="Course: SQL", source="CS-305", data={"course_id": "CS-305"})
+        changed = Chunk(text="Course: Strategy v2", source="BUS-412", data={"course_id": "BUS-412"})
+        new = Chunk(text="Course: ML", source="AI-510", data={"course_id": "AI-510"})
+        collection = NumpyCollection("courses")
+        collection.upsert(
+            ids=["CS-305", "BUS-412", "OLD-100"],
+            embeddings=[[1.0, 0.0]] * 3,
+            metadatas=[
+                {"content_hash": content_hash(same)},
+                {"content_hash": "stale-hash"},
+                {"content_hash": "gone"},
+            ],
         )
+        embedded = []
+
+        def embed(texts):
+            embedded.extend(texts)
+            return [[0.0, 1.0]] * len(texts)
+
+        with (
+            patch.object(vector_store, "get_collection", return_value=collection),
+            patch.object(vector_store, "_bump_index_version"),
+            patch("retrieval.src.indexer.embed_texts", side_effect=embed),
+        ):
+            diff = ingest([same, changed, new, same], "courses", progress=None)
+            rerun = ingest([same, changed, new], "courses", progress=None)
+
+        self.assertEqual(embedded, ["Course: Strategy v2", "Course: ML"])
+        self.assertEqual(diff.added, ["AI-510"])
+        self.assertEqual(diff.updated, ["BUS-412"])
+        self.assertEqual(diff.removed, ["OLD-100"])
+        self.assertEqual(diff.unchanged, 1)
+        self.assertEqual(
+            diff.summary(),
+            "courses: +1 added, ~1 updated, -1 removed, 1 unchanged",
+        )
+        self.assertEqual(sorted(collection.get()["ids"]), ["AI-510", "BUS-412", "CS-305"])
+        self.assertFalse(rerun.changed)
+        self.assertEqual(rerun.unchanged, 3)
+
+    def test_token_batches_respect_token_and_item_limits(self):
+        chunks = [
+            Chunk(text="word " * n, source=f"C-{i}", data={})
+            for i, n in enumerate([10, 10, 10, 40, 1, 1, 1])
+        ]
+
+        with patch("retrieval.src.indexer.estimate_tokens", side_effect=lambda t: len(t.split())):
+            batches = list(token_batches(chunks, max_tokens=25, max_items=2))
+
+        self.assertEqual(
+            [[c.source for c in b] for b in batches],
+            [["C-0", "C-1"], ["C-2"], ["C-3"], ["C-4", "C-5"], ["C-6"]],
+        )
+
+    def test_iter_records_streams_whole_catalog(self):
+        path = "retrieval/data/processed/courses.json"
+        with open(path) as f:
+            expected = json.load(f)
+
+        self.assertEqual(list(iter_records(path, read_size=97)), expected)
+
+
+class TestLexicalSearch(unittest.TestCase):
+    def test_tokenize_keeps_codes_and_acronyms(self):
+        self.assertEqual(tokenize("CS-305: A/B Testing with SQL"), ["cs305", "cs", "305", "ab", "b", "testing", "sql"])
+
+    def test_bm25_ranks_exact_code_and_tool_matches(self):
+        index = BM25Index({
+            "CS-305": "Course: Applied Data Analysis (CS-305) | Skills: SQL, A/B Testing",
+            "BUS-412": "Course: Product Strategy (BUS-412) | Skills: Roadmapping",
+            "CS-101": "Course: Intro to Programming (CS-101) | Skills: Python",
+        })
+
+        self.assertEqual(index.search("CS305", k=1)[0][0], "CS-305")
+        self.assertEqual(index.search("a/b testing", k=1)[0][0], "CS-305")
+        self.assertEqual(index.search("kubernetes"), [])
+
+    def test_reciprocal_rank_fusion_rewards_agreement(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+        self.assertEqual([id_ for id_, _ in fused][:2], ["b", "a"])
+
+
+class TestCourseFilter(unittest.TestCase):
+    def test_to_where_normalizes_codes_and_combines_clauses(self):
+        course_filter = CourseFilter(
+            course_ids_in=["CS-250", "cs250L"], course_ids_not_in={"CS250"}, degree="BSCS"
+        )
+
+        self.assertEqual(
+            course_filter.to_where(),
+            {"$and": [
+                {"course_code": {"$in": ["CS250", "CS250L"]}},
+                {"course_code": {"$nin": ["CS250"]}},
+                {"deg_BSCS": True},
+            ]},
+        )
+        self.assertIsNone(CourseFilter().to_where())
+        self.assertEqual(CourseFilter(credits=1).to_where(), {"credits": 1.0})
+
+    def test_matches_agrees_with_indexed_metadata(self):
+        course_filter = CourseFilter(course_ids_in=["CS-250L", "CS-250"], credits=1, degree="BSCS")
+
+        self.assertEqual(course_filter.allowed_ids(), {"CS-250L"})
+
+
+class _FakeClient:
+    def __init__(self):
+        self.opened = []
+
+    def get_or_create_collection(self, name, embedding_function=None):
+        self.opened.append(name)
+        return _FakeCollection()
+
+    def clear_system_cache(self):
+        pass
+
+
+class TestCollectionPool(unittest.TestCase):
+    def setUp(self):
+        vector_store.close_collections()
+
+    def _open(self, name):
+        # Pin model and backend so EMBEDDING_PROVIDER / VECTOR_BACKEND in the
+        # environment do not change the physical collection name.
+        return vector_store.get_collection(
+            name, model_name=vector_store.DEFAULT_MODELS["openai"], backend="chroma"
+        )
+
+    def tearDown(self):
+        vector_store.close_collections()
+
+    def test_get_collection_reuses_client_and_handles(self):
+        fake_client = _FakeClient()
+        before = vector_store.pool_stats()
+
+        with patch.object(vector_store.chromadb, "PersistentClient", return_value=fake_client) as factory:
+            first = self._open("courses")
+            second = self._open("courses")
+            self._open("requirements")
+
+        stats = vector_store.pool_stats()
+        self.assertIs(first, second)
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(fake_client.opened, ["courses", "requirements"])
+        self.assertEqual(stats.opens - before.opens, 1)
+        self.assertEqual(stats.hits - before.hits, 1)
+        self.assertEqual(stats.misses - before.misses, 2)
+
+    def test_refresh_collection_reopens_handle(self):
+        fake_client = _FakeClient()
+
+        with patch.object(vector_store.chromadb, "PersistentClient", return_value=fake_client):
+            first = self._open("courses")
+            vector_store.refresh_collection("courses")
+            second = self._open("courses")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(fake_client.opened, ["courses", "courses"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from retrieval.src import snapshot, vector_store
+from retrieval.src.numpy_backend import NumpyCollection
+
+
+class _Embedder:
+    model_name = "test-model"
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.collections = {}
+        for patcher in (
+            patch.object(vector_store, "get_collection", self._collection),
+            patch.object(vector_store, "VECTOR_DB_PATH", tmp.name),
+            patch.object(snapshot, "get_embedder", _Embedder),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _collection(self, name, **_):
+        return self.collections.setdefault(name, NumpyCollection(name))
+
+    def _source(self):
+        source = NumpyCollection("courses")
+        source.upsert(
+            ids=["APP-101", "CS-305", "BUS-412"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]],
+            documents=["a", "b", "c"],
+            metadatas=[{"content_hash": h, "department": "X"} for h in ("h1", "h2", "h3")],
+        )
+        self.collections["courses"] = source
+        return source
+
+    def test_round_trip_is_memory_mapped_and_restores_records(self):
+        self._source()
+        path = self.dir / "courses.snap"
+        snapshot.export_collection("courses", path)
+
+        loaded = snapshot.load_snapshot(path)
+        self.assertIsInstance(loaded.embeddings, np.memmap)
+        self.assertEqual(loaded.embeddings.dtype, np.float16)
+        self.assertEqual(loaded.model, "test-model")
+
+        written = snapshot.import_snapshot(path, "copy")
+        copy = self.collections["copy"]
+        self.assertEqual(written, 3)
+        self.assertEqual(copy.get()["ids"], ["APP-101", "CS-305", "BUS-412"])
+        self.assertEqual(copy.get()["metadatas"][2], {"content_hash": "h3", "department": "X"})
+        hits = copy.query(query_embeddings=[[0.0, 1.0]], n_results=1)
+        self.assertEqual(hits["ids"], [["CS-305"]])
+
+    def test_import_skips_current_ids_and_drops_extras(self):
+        self._source()
+        path = self.dir / "courses.snap"
+        snapshot.export_collection("courses", path)
+        self.collections["courses"].upsert(
+            ids=["OLD-1"], embeddings=[[1.0, 1.0]], metadatas=[{"content_hash": "x"}]
+        )
+
+        written = snapshot.import_snapshot(path)
+
+        self.assertEqual(written, 0)
+        self.assertEqual(sorted(self.collections["courses"].get()["ids"]), ["APP-101", "BUS-412", "CS-305"])
+
+    def test_model_mismatch_is_rejected(self):
+        self._source()
+        path = self.dir / "courses.snap"
+        snapshot.export_collection("courses", path)
+
+        with patch.object(snapshot, "get_embedder", lambda: type("E", (), {"model_name": "other"})):
+            with self.assertRaises(ValueError):
+                snapshot.import_snapshot(path)
+
+
+if __name__ == "__main__":
+    unittest.main()